@@ -0,0 +1,236 @@
+import numpy as np
+import pandas as pd
+
+from money import cents_of, signs_of, to_dollars
+
+CUBE_DIMENSIONS = ['Month', 'Category', 'Type']
+
+
+class AggregationCube:
+    def __init__(self, cells, dates, daily_expense_cents):
+        """Wrap precomputed cells; use from_frame() or merge() to build one."""
+        # One row per (Month, Category, Type) with the exact cents total, its dollar sum,
+        # and count, min, max and sum_sq of Amount
+        self.cells = cells
+        # Sorted distinct transaction dates and expense totals per date in cents
+        self.dates = dates
+        self.daily_expense_cents = daily_expense_cents
+        self._comparison = None
+
+    @classmethod
+    def from_frame(cls, frame):
+        """Aggregate categorized transactions into the cube in a single groupby pass."""
+        amounts = frame['Amount']
+        cents = cents_of(frame)
+        cells = frame.assign(Cents=cents, Amount_sq=amounts * amounts).groupby(CUBE_DIMENSIONS, observed=True).agg(
+            cents=('Cents', 'sum'),
+            count=('Amount', 'size'),
+            min=('Amount', 'min'),
+            max=('Amount', 'max'),
+            sum_sq=('Amount_sq', 'sum')
+        )
+        cells.insert(1, 'sum', to_dollars(cells['cents']))
+        # Plain labels so cubes built from categorical and object columns merge cleanly
+        cells.index = cells.index.set_levels(cells.index.levels[1].astype(object), level=1)
+
+        expenses = (signs_of(frame) < 0).to_numpy()
+        daily_expense_cents = (-cents[expenses]).groupby(frame.loc[expenses, 'Date']).sum().rename('Cents')
+        dates = np.unique(frame['Date'].to_numpy())
+        return cls(cells, dates, daily_expense_cents)
+
+    @classmethod
+    def empty(cls):
+        """A cube with no transactions, the starting point for merging chunks."""
+        index = pd.MultiIndex.from_arrays([[], [], []], names=CUBE_DIMENSIONS)
+        cells = pd.DataFrame({'cents': pd.Series(dtype='int64'), 'sum': [], 'count': [], 'min': [], 'max': [], 'sum_sq': []}, index=index)
+        return cls(cells, np.array([], dtype='datetime64[us]'), pd.Series(dtype='int64', name='Cents'))
+
+    def merge(self, other):
+        """Combine two cubes over disjoint sets of transactions (e.g. consecutive chunks)."""
+        if len(self.cells) == 0:
+            return other
+        if len(other.cells) == 0:
+            return self
+
+        cells = pd.concat([self.cells, other.cells]).groupby(level=CUBE_DIMENSIONS).agg(
+            {'cents': 'sum', 'count': 'sum', 'min': 'min', 'max': 'max', 'sum_sq': 'sum'}
+        )
+        cells.insert(1, 'sum', to_dollars(cells['cents']))
+        daily_expense_cents = self.daily_expense_cents.add(other.daily_expense_cents, fill_value=0).astype('int64').rename('Cents')
+        daily_expense_cents.index.name = 'Date'
+        return AggregationCube(cells, np.union1d(self.dates, other.dates), daily_expense_cents)
+
+    @property
+    def daily_expenses(self):
+        """Expense totals per date in dollars."""
+        return to_dollars(self.daily_expense_cents).rename('Amount')
+
+    @property
+    def months(self):
+        """Sorted months that have transactions."""
+        return sorted(self.cells.index.get_level_values('Month').unique())
+
+    @property
+    def transaction_count(self):
+        return int(self.cells['count'].sum())
+
+    @property
+    def first_date(self):
+        return pd.Timestamp(self.dates[0]) if len(self.dates) else None
+
+    @property
+    def last_date(self):
+        return pd.Timestamp(self.dates[-1]) if len(self.dates) else None
+
+    @property
+    def day_count(self):
+        """Number of distinct dates with any transaction."""
+        return len(self.dates)
+
+    def _type_cells(self, transaction_type):
+        if transaction_type not in self.cells.index.get_level_values('Type'):
+            return self.cells.iloc[0:0]
+        return self.cells.xs(transaction_type, level='Type')
+
+    def total_income(self):
+        return to_dollars(self._type_cells('Income')['cents'].sum())
+
+    def total_expenses(self):
+        """Total spending as a positive number."""
+        return abs(to_dollars(self._type_cells('Expense')['cents'].sum()))
+
+    def category_expenses(self, month=None):
+        """Spending per category as positive amounts, ordered by category name.
+
+        Only categories with at least one negative amount are included, matching
+        a filter on Amount < 0 (zero-amount rows are typed as expenses too).
+        """
+        expenses = self._type_cells('Expense')
+        if month is not None:
+            if month not in expenses.index.get_level_values('Month'):
+                return pd.Series(dtype=float, name='Amount', index=pd.Index([], name='Category'))
+            expenses = expenses.xs(month, level='Month')
+
+        by_category = expenses.groupby(level='Category').agg({'cents': 'sum', 'min': 'min'})
+        by_category = by_category[by_category['min'] < 0]
+        totals = to_dollars(-by_category['cents']).rename('Amount')
+        totals.index = totals.index.astype(object)
+        totals.index.name = 'Category'
+        return totals
+
+    def monthly_by_type(self):
+        """Amount sums per month with one column per transaction type present."""
+        return to_dollars(self.cells['cents'].groupby(level=['Month', 'Type']).sum().unstack(fill_value=0))
+
+    def month_totals(self):
+        """Income and positive expense totals per month."""
+        monthly = self.monthly_by_type()
+        return pd.DataFrame({
+            'Income': monthly['Income'] if 'Income' in monthly.columns else 0.0,
+            'Expenses': monthly['Expense'].abs() if 'Expense' in monthly.columns else 0.0
+        }, index=monthly.index)
+
+    def month_over_month(self):
+        """Income, expenses and net per month with changes against the previous month in the data.
+
+        Percentage changes follow the report convention: a change from zero is
+        +inf when the new value is positive and 0 otherwise. The first month
+        has no previous month, so its change columns are NaN.
+        """
+        frame = self.month_totals().astype(float)
+        frame['Net'] = frame['Income'] - frame['Expenses']
+
+        for column in ['Income', 'Expenses', 'Net']:
+            previous = frame[column].shift(1)
+            change = frame[column] - previous
+            frame[f'{column}_Previous'] = previous
+            frame[f'{column}_Change'] = change
+            with np.errstate(divide='ignore', invalid='ignore'):
+                pct = change / previous * 100
+            from_zero = np.where(frame[column] > 0, np.inf, 0.0)
+            frame[f'{column}_Change_Pct'] = np.where(previous == 0, from_zero, pct)
+
+        return frame
+
+    def monthly_comparison(self):
+        """Month x category comparison pivot, built once per cube."""
+        if self._comparison is None:
+            self._comparison = MonthlyComparison(self)
+        return self._comparison
+
+    def cell_statistics(self):
+        """Per-cell mean and standard deviation derived from the stored sums."""
+        stats = self.cells.copy()
+        stats['mean'] = stats['sum'] / stats['count']
+        variance = (stats['sum_sq'] - stats['count'] * stats['mean'] ** 2) / (stats['count'] - 1)
+        stats['std'] = np.sqrt(variance.clip(lower=0))
+        return stats
+
+
+class MonthlyComparison:
+    def __init__(self, cube, windows=(3, 6, 12)):
+        """Pivot the cube once into calendar months x categories for constant-time comparisons."""
+        months = cube.months
+        calendar = pd.period_range(months[0], months[-1], freq='M', name='Month') if months else pd.PeriodIndex([], freq='M', name='Month')
+
+        # Months without transactions count as zero so trailing averages cover real calendar spans
+        expense_cents = -cube._type_cells('Expense')['cents'].groupby(level=['Month', 'Category']).sum()
+        spending_cents = expense_cents.unstack(fill_value=0).reindex(calendar, fill_value=0)
+        spending_cents.columns = spending_cents.columns.astype(object)
+        spending_cents['Total'] = spending_cents.sum(axis=1)
+        self.spending = to_dollars(spending_cents)
+
+        self.totals = cube.month_totals().reindex(calendar, fill_value=0).astype(float)
+        self.totals['Net'] = self.totals['Income'] - self.totals['Expenses']
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.pct_change = self.spending.pct_change(fill_method=None) * 100
+
+        # Average of the previous `window` months, not including the month itself (NaN until there are enough)
+        self.windows = tuple(windows)
+        self.baselines = {
+            window: self.spending.rolling(window, min_periods=window).mean().shift(1)
+            for window in self.windows
+        }
+
+    @property
+    def months(self):
+        return list(self.spending.index)
+
+    def _period(self, month):
+        """The monthly Period for a month like '2024-01', or ValueError if it is malformed or outside the data."""
+        try:
+            period = pd.Period(month, freq='M')
+        except (ValueError, TypeError):
+            period = pd.NaT
+        if period is pd.NaT:
+            raise ValueError(f"Invalid month {month!r}; use YYYY-MM")
+        if period not in self.spending.index:
+            if len(self.spending.index) == 0:
+                raise ValueError(f"No data for {period}; there are no transactions")
+            raise ValueError(f"No data for {period}; transactions cover {self.spending.index[0]} to {self.spending.index[-1]}")
+        return period
+
+    def compare(self, previous_month, current_month):
+        """Spending per category (plus Total) in two months, with absolute and percentage change."""
+        previous = self.spending.loc[self._period(previous_month)]
+        current = self.spending.loc[self._period(current_month)]
+        comparison = pd.DataFrame({'Previous': previous, 'Current': current})
+        comparison['Change'] = comparison['Current'] - comparison['Previous']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            comparison['Change_Pct'] = comparison['Change'] / comparison['Previous'] * 100
+        return comparison
+
+    def against_baseline(self, month, window=3):
+        """Spending per category (plus Total) in a month versus its trailing `window`-month average."""
+        if window not in self.baselines:
+            raise ValueError(f"No {window}-month baseline; available windows: {self.windows}")
+        month = self._period(month)
+        comparison = pd.DataFrame({
+            'Current': self.spending.loc[month],
+            'Baseline': self.baselines[window].loc[month]
+        })
+        comparison['Difference'] = comparison['Current'] - comparison['Baseline']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            comparison['Difference_Pct'] = comparison['Difference'] / comparison['Baseline'] * 100
+        return comparison
@@ -20,15 +20,24 @@ import calendar
 import re
 import base64
 import secrets
-import bcrypt
 import os
 from pathlib import Path
+from categorizer import GROCERY_CATEGORIZER, CategorizationIndex, DescriptionCache, get_categorizer, keywords_fingerprint
+from date_parsing import parse_dates
+from dedup import deduplicate_statements
+from statement_cache import StatementCache
+from memo import LRUCache, figure_cache, frame_fingerprint
+from rollups import RollupStore
+from schema import compact_transactions, display_transactions, drop_unused_categories, memory_report, month_periods
+from money import add_money_columns, cents_of, cents_summary, expenses_of, signs_of, to_cents, to_dollars
+from passwords import DEFAULT_BCRYPT_ROUNDS, password_hasher, verified_sessions
+from storage import atomic_write_json, get_storage, write_coalescer
+from user_registry import get_user_registry
 
 # Optional imports for OCR functionality
 try:
     from PIL import Image
     import pytesseract
-    import numpy as np
     import cv2
     OCR_AVAILABLE = True
 except ImportError as e:
@@ -39,11 +48,6 @@ except ImportError as e:
         def open(*args, **kwargs):
             return None
     
-    class np:
-        @staticmethod
-        def array(*args, **kwargs):
-            return None
-    
     def cv2(*args, **kwargs):
         return None
 
@@ -218,11 +222,29 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Filtered view rows, rollups and metrics kept per user across reruns (the processed frame has its own slot)
+PROCESSED_CACHE_SIZE = 16
+# Bins for the amount distribution histogram
+HISTOGRAM_BINS = 25
+# Where manual expenses, subscriptions and grocery items are stored unless settings.json says otherwise ('sqlite', 'journal' or 'json')
+DEFAULT_STORAGE_BACKEND = 'sqlite'
+# Transactions above which the timeline switches to aggregated WebGL markers
+TIMELINE_POINT_BUDGET = 5000
+# Transactions larger than this percentile stay individual markers in that mode
+TIMELINE_OUTLIER_PERCENTILE = 99
+# Bucket sizes tried in order, finest first (pandas period frequency, label)
+TIMELINE_BUCKETS = [('D', 'Daily'), ('W', 'Weekly'), ('M', 'Monthly'), ('Y', 'Yearly')]
+
 class StreamlitBankAnalyzer:
     def __init__(self):
         """Initialize the Streamlit Bank Analyzer."""
         self.data_dir = Path("user_data")
         self.init_data_storage()
+        self.storage = get_storage(st.session_state.storage_backend, self.data_dir)
+        self.user_registry = get_user_registry(self.data_dir / "users.json")
+        self.statement_cache = StatementCache(self.data_dir / "statement_cache")
+        # (detected date format, rows) from the last process_csv call, or None
+        self.last_date_failures = None
         self.category_keywords = {
             'Groceries': ['walmart', 'kroger', 'trader joe', 'target', 'safeway', 'whole foods', 'costco', 'sams club', 'publix', 'aldi', 'food lion', 'harris teeter', 'giant', 'stop shop', 'wegmans', 'meijer', 'heb', 'food max', 'supermarket', 'grocery'],
             'Subscriptions': ['netflix', 'youtube', 'apple music', 'spotify', 'amazon prime', 'disney plus', 'hulu', 'hbo', 'paramount', 'peacock', 'adobe', 'microsoft', 'google one', 'icloud', 'dropbox', 'gym', 'fitness', 'subscription', 'monthly', 'annual', 'prime video'],
@@ -237,19 +259,289 @@ class StreamlitBankAnalyzer:
             'Income': ['salary', 'deposit', 'payroll', 'wages', 'bonus', 'refund', 'cashback'],
             'Uncategorized': []
         }
+        
+        # Admin-tuned category rules override the defaults and live for the session
+        if 'category_keywords' not in st.session_state:
+            st.session_state.category_keywords = self.load_settings().get('category_keywords', self.category_keywords)
+        self.category_keywords = st.session_state.category_keywords
+        # Compiled from category_keywords on first use; reset when keywords are edited
+        self.keyword_categorizer = None
+    
+    def get_keyword_categorizer(self):
+        """The compiled categorizer for the current keywords, rebuilt only after they are edited."""
+        if self.keyword_categorizer is None:
+            self.keyword_categorizer = get_categorizer(self.category_keywords)
+        return self.keyword_categorizer
     
     def categorize_transaction(self, description):
         """Categorize a transaction based on description keywords."""
-        description_lower = str(description).lower()
+        return self.get_keyword_categorizer().categorize(description)
+    
+    def get_description_cache(self):
+        """Get the session's description -> category cache, kept across reruns."""
+        if 'description_category_cache' not in st.session_state:
+            st.session_state.description_category_cache = DescriptionCache()
+        return st.session_state.description_category_cache
+    
+    def get_data_version(self, key):
+        """Version counter for a session data list (manual expenses, subscriptions, grocery items)."""
+        return st.session_state.get('data_versions', {}).get(key, 0)
+    
+    def bump_data_version(self, key):
+        """Mark a session data list as changed so cached results built from it are not reused."""
+        if 'data_versions' not in st.session_state:
+            st.session_state.data_versions = {}
+        st.session_state.data_versions[key] = st.session_state.data_versions.get(key, 0) + 1
+    
+    def get_processed_cache(self):
+        """Get the current user's LRU cache of filtered view rows, rollups and metrics."""
+        if 'processed_cache' not in st.session_state:
+            st.session_state.processed_cache = {}
+        current_user = st.session_state.get('current_user', 'default')
+        if current_user not in st.session_state.processed_cache:
+            st.session_state.processed_cache[current_user] = LRUCache(maxsize=PROCESSED_CACHE_SIZE)
+        return st.session_state.processed_cache[current_user]
+    
+    def get_processed_data(self, uploaded_file):
+        """Return (processed_df, csv_rows, data_key), reusing the last result while the inputs are unchanged."""
+        # Make sure session data is loaded so its version is final before building the key
+        self.load_manual_expenses()
+        self.load_grocery_items()
+        
+        content_hash = hashlib.sha256(uploaded_file.getvalue()).hexdigest() if uploaded_file is not None else None
+        data_key = (
+            content_hash,
+            keywords_fingerprint(self.category_keywords),
+            self.get_data_version('manual_expenses'),
+            self.get_data_version('grocery_items')
+        )
         
-        for category, keywords in self.category_keywords.items():
-            if category == 'Uncategorized':
-                continue
-            for keyword in keywords:
-                if keyword in description_lower:
-                    return category
+        # The current dataset has its own slot per user, so filter changes filling the LRU cannot evict it
+        if 'processed_data' not in st.session_state:
+            st.session_state.processed_data = {}
+        current_user = st.session_state.get('current_user', 'default')
+        cached = st.session_state.processed_data.get(current_user)
+        if cached is not None and cached[0] == data_key:
+            return cached[1] + (data_key,)
+        
+        processed_csv = None
+        if uploaded_file is not None:
+            processed_csv = self.load_statement(uploaded_file)
+            if processed_csv is None:
+                # Not cached, so the validation error is shown again on the next rerun
+                return None, None, data_key
+        
+        processed_df = self.process_dataframe(None, processed_csv)
+        result = (processed_df, len(processed_csv) if processed_csv is not None else None)
+        if processed_df is not None:
+            st.session_state.processed_data[current_user] = (data_key, result)
+        return result + (data_key,)
+    
+    def filter_rows(self, processed_df, date_range, selected_categories):
+        """Row positions kept by the sidebar date and category filters (None for all rows); returns (rows, date_range_was_empty)."""
+        keep = None
+        date_range_was_empty = False
+        
+        # Apply date filter (whole days, compared on the datetime column directly)
+        if len(date_range) == 2:
+            start_date, end_date = date_range
+            in_range = ((processed_df['Date'] >= pd.Timestamp(start_date)) &
+                        (processed_df['Date'] < pd.Timestamp(end_date) + pd.Timedelta(days=1))).to_numpy()
+            if in_range.any():
+                keep = in_range
+            else:
+                date_range_was_empty = True
+        
+        # Apply category filter
+        if selected_categories:
+            in_categories = processed_df['Category'].isin(selected_categories).to_numpy()
+            keep = in_categories if keep is None else keep & in_categories
         
-        return 'Uncategorized'
+        if keep is None or keep.all():
+            return None, date_range_was_empty
+        # Cached instead of the filtered frame: 4 bytes per kept row rather than a copy of every column
+        return np.flatnonzero(keep).astype(np.int32), date_range_was_empty
+    
+    def select_rows(self, processed_df, rows):
+        """The view of processed_df at the given row positions (the frame itself for None)."""
+        if rows is None:
+            return processed_df
+        return drop_unused_categories(processed_df.take(rows))
+    
+    def filter_transactions(self, processed_df, date_range, selected_categories):
+        """Apply the sidebar date and category filters; returns (filtered_df, date_range_was_empty)."""
+        rows, date_range_was_empty = self.filter_rows(processed_df, date_range, selected_categories)
+        return self.select_rows(processed_df, rows), date_range_was_empty
+    
+    def get_filtered_data(self, processed_df, data_key, date_range, selected_categories):
+        """filter_transactions for the current data and filter selection, caching only the selected row positions."""
+        view_key = ('view', data_key, tuple(date_range), tuple(selected_categories))
+        rows, date_range_was_empty = self.get_processed_cache().get_or_compute(
+            view_key, lambda: self.filter_rows(processed_df, date_range, selected_categories)
+        )
+        return self.select_rows(processed_df, rows), date_range_was_empty
+    
+    def record_rollup_append(self, expenses):
+        """Remember manual expenses just added, so the next rollups extend the previous store instead of rebuilding it."""
+        version = self.get_data_version('manual_expenses')
+        current_user = st.session_state.get('current_user', 'default')
+        appends = st.session_state.get('rollup_appends', {})
+        # Stores older than the processed cache can hold are evicted anyway
+        appends = {key: records for key, records in appends.items() if key[1] > version - PROCESSED_CACHE_SIZE}
+        appends[(current_user, version)] = expenses
+        st.session_state.rollup_appends = appends
+    
+    def build_rollups(self, processed_df, data_key):
+        """Rollups for a dataset version: an earlier cached store plus the manual expenses added since, else a full rebuild."""
+        content_hash, fingerprint, manual_version, grocery_version = data_key
+        current_user = st.session_state.get('current_user', 'default')
+        appends = st.session_state.get('rollup_appends', {})
+        cache = self.get_processed_cache()
+        added = []
+        while (current_user, manual_version) in appends:
+            added = appends[(current_user, manual_version)] + added
+            manual_version -= 1
+            base = cache.get(('rollups', (content_hash, fingerprint, manual_version, grocery_version)))
+            if base is not None:
+                rollups = base.append(self.manual_expenses_frame(added))
+                # Entries dropped as duplicates of statement rows leave the counts apart; rebuild then
+                if rollups.transaction_count == len(processed_df):
+                    return rollups
+                break
+        return RollupStore.from_frame(processed_df)
+    
+    def get_rollups(self, processed_df, data_key, date_range, selected_categories):
+        """Date rollups for the current view, derived from one store built per dataset version."""
+        cache = self.get_processed_cache()
+        rollups = cache.get_or_compute(('rollups', data_key), lambda: self.build_rollups(processed_df, data_key))
+        
+        def filter_rollups():
+            # Same rules as filter_transactions, applied to the daily rollup instead of the rows
+            view = rollups
+            if len(date_range) == 2:
+                view = rollups.filter(start=date_range[0], end=date_range[1])
+                if view.transaction_count == 0:
+                    view = rollups
+            if selected_categories:
+                view = view.filter(categories=selected_categories)
+            return view
+        
+        return cache.get_or_compute(('rollups', data_key, tuple(date_range), tuple(selected_categories)), filter_rollups)
+    
+    def get_overview(self, filtered_df, data_key, date_range, selected_categories, rollups=None):
+        """Memoized headline metrics and monthly budget for the current view."""
+        self.load_manual_subscriptions()
+        overview_key = (
+            'overview', data_key, tuple(date_range), tuple(selected_categories),
+            self.get_data_version('manual_subscriptions'),
+            datetime.now().date()  # the budget is computed for the current month and remaining days
+        )
+        return self.get_processed_cache().get_or_compute(
+            overview_key, lambda: (self.calculate_metrics(filtered_df), self.calculate_monthly_disposable_income(filtered_df, rollups))
+        )
+    
+    def get_chart(self, chart_id, df, data_key=None, filter_key=(), rollups=None):
+        """Build a chart through the shared figure cache, keyed on (data fingerprint, filter tuple, chart id).
+        
+        chart_id names a create_* builder, e.g. 'category_spending_chart'. Pass the
+        data_key from get_processed_data when available; otherwise the frame is hashed.
+        Builders that read date rollups get the view's RollupStore when one is given.
+        """
+        builder = getattr(self, f"create_{chart_id}")
+        if data_key is not None:
+            # data_key carries this session's version counters, so it is only unique within the session
+            if 'cache_session_token' not in st.session_state:
+                st.session_state.cache_session_token = secrets.token_hex(8)
+            fingerprint = (st.session_state.cache_session_token, data_key)
+        else:
+            fingerprint = frame_fingerprint(df)
+        key = (st.session_state.get('current_user', 'default'), fingerprint, tuple(filter_key), chart_id)
+        if rollups is not None:
+            return figure_cache.get_or_compute(key, lambda: builder(df, rollups=rollups))
+        return figure_cache.get_or_compute(key, lambda: builder(df))
+    
+    def cache_diagnostics_interface(self):
+        """Show hit/miss counters for the app's caches (admin only)."""
+        if not ('user_permissions' in st.session_state and 'admin' in st.session_state.user_permissions):
+            st.error("❌ Access denied. Admin privileges required.")
+            return
+        
+        caches = [("📈 Figures (all users)", figure_cache.stats()), ("🔐 Verified sessions (all users)", verified_sessions.cache.stats())]
+        processed_cache = st.session_state.get('processed_cache', {}).get(st.session_state.get('current_user'))
+        if processed_cache is not None:
+            caches.append(("🧮 Processed data (this session)", processed_cache.stats()))
+        description_cache = st.session_state.get('description_category_cache')
+        if description_cache is not None:
+            lookups = description_cache.hits + description_cache.misses
+            caches.append(("🏷️ Descriptions (this session)", {
+                'size': len(description_cache), 'maxsize': description_cache.maxsize,
+                'hits': description_cache.hits, 'misses': description_cache.misses,
+                'hit_rate': (description_cache.hits / lookups * 100) if lookups else 0.0
+            }))
+        
+        for label, stats in caches:
+            st.markdown(f"**{label}**")
+            st.caption(
+                f"{stats['size']}/{stats['maxsize']} entries | {stats['hits']} hits | "
+                f"{stats['misses']} misses | {stats['hit_rate']:.0f}% hit rate"
+                + (f" | {stats['evictions']} evicted" if 'evictions' in stats else "")
+            )
+        
+        password_stats = password_hasher.stats()
+        if password_stats:
+            st.markdown(f"**🔐 Password hashing ({password_hasher.workers} workers, cost {st.session_state.bcrypt_rounds})**")
+            for kind, stats in password_stats.items():
+                st.caption(
+                    f"{kind}: {stats['count']} calls | mean {stats['mean_ms']:.0f} ms | "
+                    f"p50 {stats['p50_ms']:.0f} ms | p95 {stats['p95_ms']:.0f} ms | max {stats['max_ms']:.0f} ms"
+                )
+        
+        report = st.session_state.get('memory_report')
+        if report is not None:
+            before, after = report['before'], report['after']
+            st.markdown("**🗜️ Transaction frame memory (compact layout)**")
+            columns = list(dict.fromkeys([*before.index.drop('Total'), *after.index.drop('Total'), 'Total']))
+            st.dataframe(pd.DataFrame({
+                'Before (MB)': (before.reindex(columns, fill_value=0) / 1e6).round(2),
+                'After (MB)': (after.reindex(columns, fill_value=0) / 1e6).round(2)
+            }), use_container_width=True)
+            st.caption(f"{before['Total'] / 1e6:,.1f} MB → {after['Total'] / 1e6:,.1f} MB "
+                       f"({before['Total'] / max(after['Total'], 1):.1f}x smaller)")
+        
+        if st.button("🧹 Clear Figure Cache", key="clear_figure_cache"):
+            figure_cache.clear()
+            st.success("✅ Figure cache cleared")
+    
+    def get_categorization_index(self):
+        """Get the session's categorization index over every description seen so far."""
+        index = st.session_state.get('categorization_index')
+        if index is None or index.category_keywords is not self.category_keywords:
+            index = CategorizationIndex(self.category_keywords)
+            st.session_state.categorization_index = index
+        index.index(list(self.get_description_cache().entries))
+        return index
+    
+    def add_category_keyword(self, category, keyword):
+        """Add a keyword to a category, recategorizing only the affected descriptions."""
+        changes = self.get_categorization_index().add_keyword(category, keyword.lower())
+        self.apply_category_changes(changes)
+        return changes
+    
+    def remove_category_keyword(self, category, keyword):
+        """Remove a keyword from a category, recategorizing only the affected descriptions."""
+        changes = self.get_categorization_index().remove_keyword(category, keyword.lower())
+        self.apply_category_changes(changes)
+        return changes
+    
+    def apply_category_changes(self, changes):
+        """Carry the description cache over to the edited rules and save them."""
+        index = st.session_state.categorization_index
+        self.keyword_categorizer = None
+        self.get_description_cache().rebind(index.fingerprint, changes, known=index.position)
+        
+        settings = self.load_settings()
+        settings['category_keywords'] = self.category_keywords
+        self.save_settings(settings)
     
     def init_data_storage(self):
         """Initialize data storage directory and load settings."""
@@ -261,6 +553,10 @@ class StreamlitBankAnalyzer:
             settings = self.load_settings()
             st.session_state.persistence_enabled = settings.get('persistence_enabled', False)
             st.session_state.first_time_user = settings.get('first_time_user', True)
+        if 'storage_backend' not in st.session_state or 'bcrypt_rounds' not in st.session_state:
+            settings = self.load_settings()
+            st.session_state.storage_backend = settings.get('storage_backend', DEFAULT_STORAGE_BACKEND)
+            st.session_state.bcrypt_rounds = settings.get('bcrypt_rounds', DEFAULT_BCRYPT_ROUNDS)
     
     def get_persistence_enabled(self):
         """Check if data persistence is enabled."""
@@ -282,8 +578,7 @@ class StreamlitBankAnalyzer:
         """Save app settings to file."""
         settings_file = self.data_dir / "settings.json"
         try:
-            with open(settings_file, 'w') as f:
-                json.dump(settings, f, indent=2, default=str)
+            atomic_write_json(settings_file, settings, indent=2, default=str)
         except Exception as e:
             st.error(f"Error saving settings: {e}")
     
@@ -296,33 +591,34 @@ class StreamlitBankAnalyzer:
         return filename
     
     def save_to_file(self, filename, data):
-        """Save data to user-specific JSON file."""
+        """Save a user's data list (e.g. "manual_expenses.json") through the storage backend."""
         if not self.get_persistence_enabled():
             return
         
-        user_filename = self.get_user_filename(filename)
-        filepath = self.data_dir / user_filename
+        current_user = st.session_state.get('current_user', 'default')
+        collection = filename.replace('.json', '')
+        records = list(data)
         try:
-            with open(filepath, 'w') as f:
-                json.dump(data, f, indent=2, default=str)
+            write_coalescer.submit(
+                (str(self.data_dir), current_user, collection),
+                lambda: self.storage.save(current_user, collection, records)
+            )
         except Exception as e:
-            st.error(f"Error saving {user_filename}: {e}")
+            st.error(f"Error saving {self.get_user_filename(filename)}: {e}")
     
     def load_from_file(self, filename, default=None):
-        """Load data from user-specific JSON file."""
+        """Load a user's data list (e.g. "manual_expenses.json") from the storage backend."""
         if not self.get_persistence_enabled():
             return default if default is not None else []
         
-        user_filename = self.get_user_filename(filename)
-        filepath = self.data_dir / user_filename
-        if filepath.exists():
-            try:
-                with open(filepath, 'r') as f:
-                    return json.load(f)
-            except Exception as e:
-                st.error(f"Error loading {user_filename}: {e}")
-                return default if default is not None else []
-        return default if default is not None else []
+        current_user = st.session_state.get('current_user', 'default')
+        collection = filename.replace('.json', '')
+        try:
+            records = self.storage.load(current_user, collection)
+        except Exception as e:
+            st.error(f"Error loading {self.get_user_filename(filename)}: {e}")
+            return default if default is not None else []
+        return records if records is not None else (default if default is not None else [])
     
     def setup_persistence_settings(self):
         """Setup persistence settings in sidebar."""
@@ -408,16 +704,19 @@ class StreamlitBankAnalyzer:
         expenses = self.load_from_file("manual_expenses.json", [])
         if expenses:
             st.session_state.manual_expenses = expenses
+            self.bump_data_version('manual_expenses')
         
         # Load subscriptions
         subscriptions = self.load_from_file("manual_subscriptions.json", [])
         if subscriptions:
             st.session_state.manual_subscriptions = subscriptions
+            self.bump_data_version('manual_subscriptions')
         
         # Load grocery items
         grocery_items = self.load_from_file("grocery_items.json", [])
         if grocery_items:
             st.session_state.grocery_items = grocery_items
+            self.bump_data_version('grocery_items')
     
     def save_all_data_to_files(self):
         """Save all current session data to persistent files."""
@@ -445,56 +744,109 @@ class StreamlitBankAnalyzer:
         for key in ['manual_expenses', 'manual_subscriptions', 'grocery_items']:
             if key in st.session_state:
                 st.session_state[key] = []
+                self.bump_data_version(key)
         
-        # Clear user-specific files
+        # Clear the user's stored data
         current_user = st.session_state.get('current_user', 'default')
-        for filename in ["manual_expenses.json", "manual_subscriptions.json", "grocery_items.json"]:
-            user_filename = self.get_user_filename(filename)
-            filepath = self.data_dir / user_filename
-            if filepath.exists():
-                try:
-                    filepath.unlink()
-                except Exception as e:
-                    st.error(f"Error deleting {user_filename}: {e}")
+        try:
+            self.storage.clear(current_user)
+        except Exception as e:
+            st.error(f"Error deleting saved data for {current_user}: {e}")
+    
+    def report_date_failures(self, failed_rows, date_format):
+        """Show the uploaded rows whose dates could not be parsed instead of dropping them silently."""
+        st.warning(f"⚠️ {len(failed_rows)} rows have dates that could not be parsed (detected format: {date_format}) and were skipped")
+        with st.expander("📋 Rows with unparseable dates", expanded=False):
+            display_rows = failed_rows[['Date', 'Description', 'Amount']].copy()
+            # +2 accounts for the header line and 1-based line numbers
+            display_rows.insert(0, 'Line', display_rows.index + 2)
+            st.dataframe(display_rows, hide_index=True)
     
-    def process_dataframe(self, df):
-        """Process the uploaded DataFrame and combine with manual entries."""
+    def load_statement(self, uploaded_file):
+        """Return the processed frame for an uploaded CSV, reusing the on-disk cache for files seen before."""
+        content = uploaded_file.getvalue()
+        current_user = st.session_state.get('current_user', 'default')
+        use_cache = self.statement_cache.enabled and self.get_persistence_enabled()
+        
+        if use_cache:
+            # Categories depend on the keyword rules, so they are part of the key
+            key = self.statement_cache.make_key(content, keywords_fingerprint(self.category_keywords))
+            cached = self.statement_cache.load(current_user, key)
+            if cached is not None:
+                cached_frame, date_failures = cached
+                if date_failures is not None:
+                    date_format, failed_rows = date_failures
+                    self.report_date_failures(failed_rows, date_format)
+                return cached_frame
+        
+        processed_csv = self.process_csv(pd.read_csv(io.BytesIO(content)))
+        if use_cache and processed_csv is not None and len(processed_csv) > 0:
+            try:
+                cached = processed_csv.copy()
+                cached['Source'] = 'CSV Upload'
+                self.statement_cache.save(current_user, key, cached, self.last_date_failures)
+            except Exception as e:
+                st.warning(f"⚠️ Could not cache processed statement: {e}")
+        return processed_csv
+    
+    def process_csv(self, df):
+        """Validate, parse and categorize an uploaded CSV frame."""
+        # Validate columns
+        required_columns = ['Date', 'Description', 'Amount']
+        if not all(col in df.columns for col in required_columns):
+            st.error(f"❌ CSV must contain columns: {required_columns}")
+            return None
+        
+        # Convert Date column to datetime with the format detected for this user's bank export
+        profile = (st.session_state.get('current_user', 'default'), tuple(df.columns))
+        dates, date_format, failed = parse_dates(df['Date'], profile)
+        # Kept so load_statement can store the failures with the cached statement
+        self.last_date_failures = None
+        if failed.any():
+            self.last_date_failures = (date_format, df.loc[failed, ['Date', 'Description', 'Amount']])
+            self.report_date_failures(df[failed], date_format)
+        df['Date'] = dates
+        
+        # Convert Amount to exact integer cents (NA when not a number)
+        df['Cents'] = to_cents(df['Amount'])
+        
+        # Remove rows with invalid data
+        df = df.dropna()
+        df['Cents'] = df['Cents'].astype('int64')
+        df['Sign'] = np.sign(df['Cents']).astype('int8')
+        df['Amount'] = to_dollars(df['Cents'])
+        
+        # Add categorization
+        categorizer = self.get_keyword_categorizer()
+        df['Category'] = categorizer.categorize_descriptions(
+            df['Description'], self.get_description_cache()
+        ).astype(object)
+        
+        # Separate income and expenses
+        df['Type'] = np.where(df['Sign'] > 0, 'Income', 'Expense')
+        df['Month'] = df['Date'].dt.to_period('M')
+        
+        return df
+    
+    def process_dataframe(self, df, processed_csv=None):
+        """Process the uploaded DataFrame (or reuse an already processed one) and combine with manual entries."""
         try:
-            processed_csv = None
-            
             # Process CSV data if provided
-            if df is not None and len(df) > 0:
-                # Validate columns
-                required_columns = ['Date', 'Description', 'Amount']
-                if not all(col in df.columns for col in required_columns):
-                    st.error(f"❌ CSV must contain columns: {required_columns}")
+            if processed_csv is None and df is not None and len(df) > 0:
+                processed_csv = self.process_csv(df)
+                if processed_csv is None:
                     return None
-                
-                # Convert Date column to datetime
-                df['Date'] = pd.to_datetime(df['Date'])
-                
-                # Convert Amount to numeric
-                df['Amount'] = pd.to_numeric(df['Amount'], errors='coerce')
-                
-                # Remove rows with invalid data
-                df = df.dropna()
-                
-                # Add categorization
-                df['Category'] = df['Description'].apply(self.categorize_transaction)
-                
-                # Separate income and expenses
-                df['Type'] = df['Amount'].apply(lambda x: 'Income' if x > 0 else 'Expense')
-                df['Month'] = df['Date'].dt.to_period('M')
-                
-                processed_csv = df
             
             # Combine with all manual entries
             combined_df = self.combine_all_transactions(processed_csv)
+            result = combined_df if len(combined_df) > 0 else processed_csv
+            if result is None:
+                return None
             
-            if len(combined_df) > 0:
-                return combined_df
-            else:
-                return processed_csv
+            # Keep the frame held in session state in the compact layout
+            compact = compact_transactions(result)
+            st.session_state.memory_report = {'before': memory_report(result), 'after': memory_report(compact)}
+            return compact
             
         except Exception as e:
             st.error(f"❌ Error processing data: {e}")
@@ -502,14 +854,16 @@ class StreamlitBankAnalyzer:
     
     def calculate_metrics(self, df):
         """Calculate financial metrics."""
-        total_income = df[df['Amount'] > 0]['Amount'].sum()
-        total_expenses = abs(df[df['Amount'] < 0]['Amount'].sum())
+        # Exact sums in cents, selected with the precomputed sign flags
+        cents, sign = cents_of(df).to_numpy(dtype=np.int64), signs_of(df).to_numpy()
+        total_income = to_dollars(cents[sign > 0].sum())
+        total_expenses = abs(to_dollars(cents[sign < 0].sum()))
         total_savings = total_income - total_expenses
         savings_rate = (total_savings / total_income * 100) if total_income > 0 else 0
         
         return total_income, total_expenses, total_savings, savings_rate
     
-    def calculate_monthly_disposable_income(self, df):
+    def calculate_monthly_disposable_income(self, df, rollups=None):
         """Calculate monthly disposable income after subscriptions and fixed payments."""
         from datetime import datetime, timedelta
         import calendar
@@ -521,21 +875,19 @@ class StreamlitBankAnalyzer:
         
         # Filter for current month if we have date data
         if not df.empty and 'Date' in df.columns:
-            df_current_month = df[
-                (df['Date'].dt.month == current_month) & 
-                (df['Date'].dt.year == current_year)
-            ]
+            if rollups is None:
+                rollups = RollupStore.from_frame(df)
+            this_month = pd.Period(year=current_year, month=current_month, freq='M')
+            
             # Calculate monthly income from current month
-            monthly_income = df_current_month[df_current_month['Amount'] > 0]['Amount'].sum()
+            monthly_income = rollups.totals('month')['income'].get(this_month, 0.0)
             
             # Identify recurring/fixed expenses from transaction data
             recurring_categories = ['Bills', 'Insurance', 'Utilities', 'Rent', 'Mortgage']
-            recurring_expenses = abs(df_current_month[
-                df_current_month['Category'].isin(recurring_categories)
-            ]['Amount'].sum())
+            recurring_expenses = abs(rollups.totals('month', categories=recurring_categories)['net'].get(this_month, 0.0))
         else:
             # If no transaction data, estimate from overall data
-            monthly_income = df[df['Amount'] > 0]['Amount'].sum() if not df.empty else 0
+            monthly_income = to_dollars(cents_of(df)[(signs_of(df) > 0).to_numpy()].sum()) if not df.empty else 0
             recurring_expenses = 0
         
         # Get monthly subscription costs
@@ -574,14 +926,17 @@ class StreamlitBankAnalyzer:
     
     def create_category_spending_chart(self, df):
         """Create interactive category spending bar chart using Plotly."""
-        expenses_df = df[df['Amount'] < 0].copy()
-        expenses_df['Amount'] = expenses_df['Amount'].abs()
-        
-        # Get detailed category statistics
-        category_stats = expenses_df.groupby('Category').agg({
-            'Amount': ['sum', 'mean', 'count', 'min', 'max']
-        }).round(2)
-        category_stats.columns = ['Total', 'Average', 'Count', 'Min', 'Max']
+        expenses_df = expenses_of(df)
+        
+        # Get detailed category statistics, exact in cents and shown in dollars
+        cents_stats = expenses_df.groupby('Category', observed=True)['Cents'].agg(['sum', 'count', 'min', 'max'])
+        category_stats = pd.DataFrame({
+            'Total': to_dollars(cents_stats['sum']),
+            'Average': to_dollars(cents_stats['sum'] / cents_stats['count']).round(2),
+            'Count': cents_stats['count'],
+            'Min': to_dollars(cents_stats['min']),
+            'Max': to_dollars(cents_stats['max'])
+        })
         category_stats = category_stats.sort_values('Total', ascending=True)
         
         if len(category_stats) == 0:
@@ -645,17 +1000,16 @@ class StreamlitBankAnalyzer:
         
         return fig
     
-    def create_monthly_trends_chart(self, df):
+    def create_monthly_trends_chart(self, df, rollups=None):
         """Create interactive monthly trends line chart with enhanced features."""
-        monthly_data = df.groupby('Month').agg({
-            'Amount': lambda x: [x[x > 0].sum(), abs(x[x < 0].sum()), len(x)]
-        }).reset_index()
+        if rollups is None:
+            rollups = RollupStore.from_frame(df)
+        monthly_data = rollups.totals('month').reset_index().rename(columns={
+            'Period': 'Month', 'income': 'Income', 'expenses': 'Expenses', 'count': 'Transaction_Count'
+        })
         
-        monthly_data['Income'] = monthly_data['Amount'].apply(lambda x: x[0])
-        monthly_data['Expenses'] = monthly_data['Amount'].apply(lambda x: x[1])
         monthly_data['Savings'] = monthly_data['Income'] - monthly_data['Expenses']
         monthly_data['Savings_Rate'] = ((monthly_data['Savings'] / monthly_data['Income']) * 100).round(1)
-        monthly_data['Transaction_Count'] = monthly_data['Amount'].apply(lambda x: x[2])
         monthly_data['Month_Str'] = monthly_data['Month'].astype(str)
         
         # Create subplot with secondary y-axis for savings rate
@@ -791,18 +1145,21 @@ class StreamlitBankAnalyzer:
     
     def create_pie_chart(self, df):
         """Create interactive pie chart for category spending with drill-down capability."""
-        expenses_df = df[df['Amount'] < 0].copy()
-        expenses_df['Amount'] = expenses_df['Amount'].abs()
-        
-        # Get detailed statistics for each category
-        category_stats = expenses_df.groupby('Category').agg({
-            'Amount': ['sum', 'mean', 'count'],
-            'Description': lambda x: x.mode().iloc[0] if len(x.mode()) > 0 else 'Various'
-        }).round(2)
-        
-        category_stats.columns = ['Total', 'Average', 'Count', 'Most_Common']
-        total_expenses = category_stats['Total'].sum()
-        category_stats['Percentage'] = ((category_stats['Total'] / total_expenses) * 100).round(1)
+        expenses_df = expenses_of(df)
+        
+        # Get detailed statistics for each category, exact in cents and shown in dollars
+        cents_stats = expenses_df.groupby('Category', observed=True).agg(
+            cents=('Cents', 'sum'),
+            count=('Cents', 'count'),
+            most_common=('Description', lambda x: x.mode().iloc[0] if len(x.mode()) > 0 else 'Various')
+        )
+        category_stats = pd.DataFrame({
+            'Total': to_dollars(cents_stats['cents']),
+            'Average': to_dollars(cents_stats['cents'] / cents_stats['count']).round(2),
+            'Count': cents_stats['count'],
+            'Most_Common': cents_stats['most_common'],
+            'Percentage': (cents_stats['cents'] / cents_stats['cents'].sum() * 100).round(1)
+        })
         category_stats = category_stats.sort_values('Total', ascending=False)
         
         if len(category_stats) == 0:
@@ -886,11 +1243,33 @@ class StreamlitBankAnalyzer:
         
         return fig
     
+    def create_histogram_bars(self, values, name, color, line_color, bins=HISTOGRAM_BINS):
+        """Pre-bin values with np.histogram and return a bar trace, so the figure is O(bins) not O(rows)."""
+        counts, edges = np.histogram(values.to_numpy(dtype=float), bins=bins)
+        percentages = counts / counts.sum() * 100 if counts.sum() > 0 else np.zeros(len(counts))
+        
+        return go.Bar(
+            x=(edges[:-1] + edges[1:]) / 2,
+            y=counts,
+            width=np.diff(edges),
+            name=name,
+            marker_color=color,
+            marker_line=dict(width=1, color=line_color),
+            hovertemplate=(
+                'Range: $%{customdata[0]:,.0f} - $%{customdata[1]:,.0f}<br>' +
+                'Frequency: %{y}<br>' +
+                'Percentage: %{customdata[2]:.1f}%<br>' +
+                '<extra></extra>'
+            ),
+            customdata=np.column_stack([edges[:-1], edges[1:], percentages])
+        )
+    
     def create_amount_histogram(self, df):
         """Create interactive histogram for amount distribution with statistical overlay."""
         # Separate income and expenses
-        income_data = df[df['Amount'] > 0]['Amount']
-        expense_data = df[df['Amount'] < 0]['Amount'].abs()
+        signs = signs_of(df).to_numpy()
+        income_data = df['Amount'][signs > 0]
+        expense_data = expenses_of(df)['Amount']
         
         # Calculate statistics
         income_stats = {
@@ -921,19 +1300,8 @@ class StreamlitBankAnalyzer:
         # Income histogram with statistical lines
         if len(income_data) > 0:
             fig.add_trace(
-                go.Histogram(
-                    x=income_data,
-                    nbinsx=25,
-                    name='Income Frequency',
-                    marker_color='rgba(46, 139, 87, 0.7)',
-                    marker_line=dict(width=1, color='rgba(46, 139, 87, 1)'),
-                    hovertemplate=(
-                        'Range: $%{x:,.0f}<br>' +
-                        'Frequency: %{y}<br>' +
-                        'Percentage: %{customdata:.1f}%<br>' +
-                        '<extra></extra>'
-                    ),
-                    customdata=[(income_data.value_counts(bins=25, normalize=True) * 100).values] * len(income_data)
+                self.create_histogram_bars(
+                    income_data, 'Income Frequency', 'rgba(46, 139, 87, 0.7)', 'rgba(46, 139, 87, 1)'
                 ),
                 row=1, col=1
             )
@@ -959,19 +1327,8 @@ class StreamlitBankAnalyzer:
         # Expense histogram with statistical lines
         if len(expense_data) > 0:
             fig.add_trace(
-                go.Histogram(
-                    x=expense_data,
-                    nbinsx=25,
-                    name='Expense Frequency',
-                    marker_color='rgba(220, 20, 60, 0.7)',
-                    marker_line=dict(width=1, color='rgba(220, 20, 60, 1)'),
-                    hovertemplate=(
-                        'Range: $%{x:,.0f}<br>' +
-                        'Frequency: %{y}<br>' +
-                        'Percentage: %{customdata:.1f}%<br>' +
-                        '<extra></extra>'
-                    ),
-                    customdata=[(expense_data.value_counts(bins=25, normalize=True) * 100).values] * len(expense_data)
+                self.create_histogram_bars(
+                    expense_data, 'Expense Frequency', 'rgba(220, 20, 60, 0.7)', 'rgba(220, 20, 60, 1)'
                 ),
                 row=2, col=1
             )
@@ -1052,79 +1409,130 @@ class StreamlitBankAnalyzer:
         
         return fig
     
-    def create_transaction_timeline(self, df):
-        """Create interactive transaction timeline scatter plot."""
-        # Create a copy and prepare data
-        timeline_df = df.copy()
+    def summarize_timeline(self, timeline_df, point_budget=TIMELINE_POINT_BUDGET, outlier_percentile=TIMELINE_OUTLIER_PERCENTILE):
+        """Reduce transactions to about point_budget markers: outliers stay individual, the rest become period totals."""
+        # Largest transactions keep their own markers, capped at half the budget
+        threshold = np.percentile(timeline_df['AbsAmount'], outlier_percentile)
+        outliers = timeline_df[timeline_df['AbsAmount'] > threshold].nlargest(point_budget // 2, 'AbsAmount')
+        rest = timeline_df.drop(outliers.index)
+        rest = rest[rest['Amount'] != 0]
+        
+        # Finest period whose income + expense buckets fit in the remaining budget
+        remaining = max(point_budget - len(outliers), 1)
+        for freq, label in TIMELINE_BUCKETS:
+            periods = rest['Date'].dt.to_period(freq)
+            if periods.nunique() * 2 <= remaining:
+                break
+        
+        buckets = rest.groupby([periods.dt.start_time.rename('Date'), rest['Color']]).agg(
+            Cents=('Cents', 'sum'),
+            Count=('Cents', 'size')
+        ).reset_index()
+        buckets['Amount'] = to_dollars(buckets['Cents'])
+        buckets['AbsAmount'] = buckets['Amount'].abs()
+        return outliers, buckets, freq, label
+    
+    def create_transaction_timeline(self, df, point_budget=TIMELINE_POINT_BUDGET):
+        """Create interactive transaction timeline scatter plot.
+        
+        Above point_budget transactions the chart switches to a level-of-detail
+        view: outliers are plotted individually, everything else as daily,
+        weekly or monthly totals, and traces render with WebGL.
+        """
+        # Copy only the plotted columns and prepare data
+        timeline_df = df[['Date', 'Description', 'Amount', 'Category']].copy()
+        timeline_df['Cents'] = cents_of(df).to_numpy()
         timeline_df['AbsAmount'] = timeline_df['Amount'].abs()
-        timeline_df['Color'] = timeline_df['Amount'].apply(lambda x: 'Income' if x > 0 else 'Expense')
+        timeline_df['Color'] = np.where(signs_of(df).to_numpy() > 0, 'Income', 'Expense')
+        
+        detailed = len(timeline_df) <= point_budget
+        scatter = go.Scatter if detailed else go.Scattergl
         
         # Create interactive scatter plot
         fig = go.Figure()
         
-        # Income transactions
-        income_df = timeline_df[timeline_df['Amount'] > 0]
-        if len(income_df) > 0:
-            fig.add_trace(go.Scatter(
-                x=income_df['Date'],
-                y=income_df['Amount'],
-                mode='markers',
-                name='💰 Income',
-                marker=dict(
-                    size=income_df['AbsAmount'] / income_df['AbsAmount'].max() * 30 + 5,
-                    color='#2E8B57',
-                    opacity=0.7,
-                    line=dict(width=1, color='darkgreen'),
-                    symbol='circle'
-                ),
-                hovertemplate=(
-                    "<b>%{text}</b><br>" +
-                    "Date: %{x}<br>" +
-                    "Amount: $%{y:,.2f}<br>" +
-                    "Category: %{customdata}<br>" +
-                    "<extra></extra>"
-                ),
-                text=income_df['Description'],
-                customdata=income_df['Category']
-            ))
-        
-        # Expense transactions
-        expense_df = timeline_df[timeline_df['Amount'] < 0]
-        if len(expense_df) > 0:
-            fig.add_trace(go.Scatter(
-                x=expense_df['Date'],
-                y=expense_df['Amount'],
-                mode='markers',
-                name='💸 Expenses',
-                marker=dict(
-                    size=expense_df['AbsAmount'] / expense_df['AbsAmount'].max() * 30 + 5,
-                    color='#DC143C',
-                    opacity=0.7,
-                    line=dict(width=1, color='darkred'),
-                    symbol='square'
-                ),
-                hovertemplate=(
-                    "<b>%{text}</b><br>" +
-                    "Date: %{x}<br>" +
-                    "Amount: $%{y:,.2f}<br>" +
-                    "Category: %{customdata}<br>" +
-                    "<extra></extra>"
-                ),
-                text=expense_df['Description'],
-                customdata=expense_df['Category']
-            ))
+        if detailed:
+            points, buckets = timeline_df, timeline_df.iloc[0:0]
+        else:
+            points, buckets, freq, bucket_label = self.summarize_timeline(timeline_df, point_budget)
+        
+        # Scale bubbles against the largest marker shown, whether a transaction or a bucket total
+        size_reference = max(points['AbsAmount'].max() if len(points) else 0, buckets['AbsAmount'].max() if len(buckets) else 0) or 1
+        
+        transaction_hover = (
+            "<b>%{text}</b><br>" +
+            "Date: %{x}<br>" +
+            "Amount: $%{y:,.2f}<br>" +
+            "Category: %{customdata}<br>" +
+            "<extra></extra>"
+        )
+        
+        for kind, name, color, line_color, symbol in [
+            ('Income', '💰 Income', '#2E8B57', 'darkgreen', 'circle'),
+            ('Expense', '💸 Expenses', '#DC143C', 'darkred', 'square')
+        ]:
+            kind_points = points[(points['Amount'] > 0) if kind == 'Income' else (points['Amount'] < 0)]
+            if len(kind_points) > 0:
+                fig.add_trace(scatter(
+                    x=kind_points['Date'],
+                    y=kind_points['Amount'],
+                    mode='markers',
+                    name=name if detailed else f'{name} (largest)',
+                    legendgroup=kind,
+                    marker=dict(
+                        size=kind_points['AbsAmount'] / size_reference * 30 + 5,
+                        color=color,
+                        opacity=0.7,
+                        line=dict(width=1, color=line_color),
+                        symbol=symbol
+                    ),
+                    hovertemplate=transaction_hover,
+                    text=kind_points['Description'],
+                    customdata=kind_points['Category']
+                ))
+            
+            kind_buckets = buckets[buckets['Color'] == kind]
+            if len(kind_buckets) > 0:
+                fig.add_trace(scatter(
+                    x=kind_buckets['Date'],
+                    y=kind_buckets['Amount'],
+                    mode='markers',
+                    name=f'{name} ({bucket_label.lower()} totals)',
+                    legendgroup=kind,
+                    marker=dict(
+                        size=kind_buckets['AbsAmount'] / size_reference * 30 + 5,
+                        color=color,
+                        opacity=0.4,
+                        line=dict(width=1, color=line_color),
+                        symbol=symbol
+                    ),
+                    hovertemplate=(
+                        f"<b>{bucket_label} {kind.lower()} total</b><br>" +
+                        "Period starting: %{x}<br>" +
+                        "Amount: $%{y:,.2f}<br>" +
+                        "Transactions: %{customdata:,}<br>" +
+                        "<extra></extra>"
+                    ),
+                    customdata=kind_buckets['Count']
+                ))
         
         # Add zero line
         fig.add_hline(y=0, line_dash="dash", line_color="gray", opacity=0.5)
         
-        # Calculate running balance
+        # Calculate running balance (one point per transaction, or per bucket period in level-of-detail mode)
         timeline_df_sorted = timeline_df.sort_values('Date')
-        timeline_df_sorted['RunningBalance'] = timeline_df_sorted['Amount'].cumsum()
+        if detailed:
+            balance_dates = timeline_df_sorted['Date']
+            running_balance = to_dollars(timeline_df_sorted['Cents'].cumsum())
+        else:
+            period_totals = timeline_df_sorted.groupby(timeline_df_sorted['Date'].dt.to_period(freq))['Cents'].sum()
+            balance_dates = period_totals.index.start_time
+            running_balance = to_dollars(period_totals.cumsum())
         
         # Add running balance line
-        fig.add_trace(go.Scatter(
-            x=timeline_df_sorted['Date'],
-            y=timeline_df_sorted['RunningBalance'],
+        fig.add_trace(scatter(
+            x=balance_dates,
+            y=running_balance,
             mode='lines',
             name='💼 Running Balance',
             line=dict(color='#4169E1', width=2, dash='dot'),
@@ -1171,8 +1579,13 @@ class StreamlitBankAnalyzer:
         )
         
         # Add annotation with better positioning
+        if detailed:
+            annotation = "💡 Bubble size = amount | Click legend to toggle | 🔍 Toolbar for zoom/pan/select"
+        else:
+            annotation = (f"💡 {len(timeline_df):,} transactions: largest shown individually, the rest as "
+                          f"{bucket_label.lower()} totals | Click legend to toggle | 🔍 Toolbar for zoom/pan/select")
         fig.add_annotation(
-            text="💡 Bubble size = amount | Click legend to toggle | 🔍 Toolbar for zoom/pan/select",
+            text=annotation,
             xref="paper", yref="paper",
             x=0.5, y=-0.35, xanchor="center", yanchor="top",
             showarrow=False,
@@ -1181,23 +1594,21 @@ class StreamlitBankAnalyzer:
         
         return fig
     
-    def create_recurring_expenses_analysis(self, df):
+    def create_recurring_expenses_analysis(self, df, rollups=None):
         """Create analysis for recurring/repetitive expenses."""
         # Focus on key recurring categories
         recurring_categories = ['Subscriptions', 'Utilities', 'Gas & Fuel', 'Groceries', 'Insurance', 'Housing']
         
-        expenses_df = df[df['Amount'] < 0].copy()
-        expenses_df['Amount'] = expenses_df['Amount'].abs()
-        expenses_df['YearMonth'] = expenses_df['Date'].dt.to_period('M')
+        if rollups is None:
+            rollups = RollupStore.from_frame(df)
         
-        # Filter for recurring categories
-        recurring_df = expenses_df[expenses_df['Category'].isin(recurring_categories)]
+        # Monthly spending by category, for recurring categories only
+        monthly_recurring = rollups.by_category('month').rename('Amount').rename_axis(['YearMonth', 'Category']).reset_index()
+        monthly_recurring = monthly_recurring[monthly_recurring['Category'].isin(recurring_categories)]
         
-        if len(recurring_df) == 0:
+        if len(monthly_recurring) == 0:
             return None
         
-        # Calculate monthly spending by category
-        monthly_recurring = recurring_df.groupby(['YearMonth', 'Category'])['Amount'].sum().reset_index()
         monthly_recurring['YearMonth_str'] = monthly_recurring['YearMonth'].astype(str)
         
         # Create stacked bar chart
@@ -1229,9 +1640,9 @@ class StreamlitBankAnalyzer:
                 ))
         
         # Calculate YTD totals for annotation
-        current_year = df['Date'].dt.year.max()
-        ytd_data = recurring_df[recurring_df['Date'].dt.year == current_year]
-        ytd_totals = ytd_data.groupby('Category')['Amount'].sum().sort_values(ascending=False)
+        current_year = rollups.periods('year').max().year
+        ytd_totals = rollups.by_category('year', period=current_year)
+        ytd_totals = ytd_totals[ytd_totals.index.isin(recurring_categories)].sort_values(ascending=False)
         
         fig.update_layout(
             title={
@@ -1271,17 +1682,19 @@ class StreamlitBankAnalyzer:
         
         return fig
     
-    def create_ytd_spending_breakdown(self, df):
+    def create_ytd_spending_breakdown(self, df, rollups=None):
         """Create YTD spending breakdown by category."""
-        current_year = df['Date'].dt.year.max()
-        ytd_data = df[(df['Date'].dt.year == current_year) & (df['Amount'] < 0)].copy()
-        ytd_data['Amount'] = ytd_data['Amount'].abs()
-        
-        if len(ytd_data) == 0:
+        if rollups is None:
+            rollups = RollupStore.from_frame(df)
+        if rollups.transaction_count == 0:
             return None
         
-        # Calculate YTD spending by category
-        ytd_spending = ytd_data.groupby('Category')['Amount'].sum().sort_values(ascending=False)
+        # YTD spending by category, read from the yearly rollup
+        current_year = rollups.periods('year').max().year
+        ytd_spending = rollups.by_category('year', period=current_year).sort_values(ascending=False)
+        
+        if len(ytd_spending) == 0:
+            return None
         total_ytd = ytd_spending.sum()
         
         # Create horizontal bar chart
@@ -1339,15 +1752,14 @@ class StreamlitBankAnalyzer:
     def create_expense_optimization_insights(self, df):
         """Generate detailed expense optimization recommendations."""
         current_year = df['Date'].dt.year.max()
-        expenses_df = df[df['Amount'] < 0].copy()
-        expenses_df['Amount'] = expenses_df['Amount'].abs()
+        expenses_df = expenses_of(df)
         
         insights = []
         insights.append("🎯 **Expense Optimization Analysis**")
         insights.append("")
         
-        # 1. Identify highest spending categories
-        category_spending = expenses_df.groupby('Category')['Amount'].sum().sort_values(ascending=False)
+        # 1. Identify highest spending categories (summed in exact cents)
+        category_spending = to_dollars(expenses_df.groupby('Category', observed=True)['Cents'].sum()).sort_values(ascending=False)
         top_3_categories = category_spending.head(3)
         
         insights.append("📈 **Top 3 Expense Categories to Target:**")
@@ -1359,14 +1771,15 @@ class StreamlitBankAnalyzer:
         # 2. Subscription analysis
         subscription_expenses = expenses_df[expenses_df['Category'] == 'Subscriptions']
         if len(subscription_expenses) > 0:
-            monthly_subs = subscription_expenses.groupby(subscription_expenses['Date'].dt.to_period('M'))['Amount'].sum()
+            monthly_subs = to_dollars(subscription_expenses.groupby(subscription_expenses['Date'].dt.to_period('M'))['Cents'].sum())
             avg_monthly_subs = monthly_subs.mean()
             insights.append("🔄 **Subscription Analysis:**")
             insights.append(f"• Average monthly subscriptions: **${avg_monthly_subs:.2f}**")
             insights.append(f"• Annual projected cost: **${avg_monthly_subs * 12:,.2f}**")
             
             # Find individual subscriptions
-            sub_merchants = subscription_expenses.groupby('Description')['Amount'].agg(['sum', 'count']).sort_values('sum', ascending=False)
+            sub_merchants = subscription_expenses.groupby('Description', observed=True)['Cents'].agg(['sum', 'count']).sort_values('sum', ascending=False)
+            sub_merchants['sum'] = to_dollars(sub_merchants['sum'])
             if len(sub_merchants) > 0:
                 insights.append("• Top subscription expenses:")
                 for desc, row in sub_merchants.head(3).iterrows():
@@ -1378,8 +1791,8 @@ class StreamlitBankAnalyzer:
         for cat in recurring_cats:
             cat_data = expenses_df[expenses_df['Category'] == cat]
             if len(cat_data) > 0:
-                monthly_avg = cat_data.groupby(cat_data['Date'].dt.to_period('M'))['Amount'].sum().mean()
-                total_spent = cat_data['Amount'].sum()
+                monthly_avg = to_dollars(cat_data.groupby(cat_data['Date'].dt.to_period('M'))['Cents'].sum()).mean()
+                total_spent = to_dollars(cat_data['Cents'].sum())
                 insights.append(f"💡 **{cat}**: ${total_spent:,.2f} YTD (${monthly_avg:,.0f}/month avg)")
         
         insights.append("")
@@ -1389,26 +1802,26 @@ class StreamlitBankAnalyzer:
         if len(subscription_expenses) > 0 and avg_monthly_subs > 50:
             insights.append(f"• **Review subscriptions**: You're spending ${avg_monthly_subs:.0f}/month. Cancel unused services to save ${avg_monthly_subs * 0.3:.0f}+/month")
         
-        grocery_spending = expenses_df[expenses_df['Category'] == 'Groceries']['Amount'].sum()
+        grocery_spending = to_dollars(expenses_df[expenses_df['Category'] == 'Groceries']['Cents'].sum())
         if grocery_spending > 0:
             monthly_grocery = grocery_spending / len(expenses_df['Date'].dt.to_period('M').unique())
             if monthly_grocery > 400:
                 insights.append(f"• **Grocery optimization**: ${monthly_grocery:.0f}/month is above average. Try meal planning and bulk buying")
         
-        dining_spending = expenses_df[expenses_df['Category'] == 'Dining Out']['Amount'].sum()
+        dining_spending = to_dollars(expenses_df[expenses_df['Category'] == 'Dining Out']['Cents'].sum())
         if dining_spending > 0:
             monthly_dining = dining_spending / len(expenses_df['Date'].dt.to_period('M').unique())
             if monthly_dining > 200:
                 potential_savings = monthly_dining * 0.5
                 insights.append(f"• **Dining out**: ${monthly_dining:.0f}/month. Cooking more could save ${potential_savings:.0f}/month")
         
-        gas_spending = expenses_df[expenses_df['Category'] == 'Gas & Fuel']['Amount'].sum()
+        gas_spending = to_dollars(expenses_df[expenses_df['Category'] == 'Gas & Fuel']['Cents'].sum())
         if gas_spending > 0:
             monthly_gas = gas_spending / len(expenses_df['Date'].dt.to_period('M').unique())
             insights.append(f"• **Fuel efficiency**: Track gas spending patterns to optimize routes and find cheaper stations")
         
         # 5. Overall savings potential
-        total_monthly = expenses_df.groupby(expenses_df['Date'].dt.to_period('M'))['Amount'].sum().mean()
+        total_monthly = to_dollars(expenses_df.groupby(expenses_df['Date'].dt.to_period('M'))['Cents'].sum()).mean()
         potential_monthly_savings = (avg_monthly_subs * 0.2 if len(subscription_expenses) > 0 else 0) + \
                                   (monthly_dining * 0.3 if dining_spending > 0 else 0)
         
@@ -1423,8 +1836,7 @@ class StreamlitBankAnalyzer:
         """Create a calendar view of recurring expenses."""
         recurring_categories = ['Subscriptions', 'Utilities', 'Gas & Fuel', 'Insurance']
         
-        expenses_df = df[df['Amount'] < 0].copy()
-        expenses_df['Amount'] = expenses_df['Amount'].abs()
+        expenses_df = expenses_of(df)
         
         # Filter for recurring categories
         recurring_df = expenses_df[expenses_df['Category'].isin(recurring_categories)]
@@ -1432,8 +1844,9 @@ class StreamlitBankAnalyzer:
         if len(recurring_df) == 0:
             return None
         
-        # Group by date and category
-        daily_expenses = recurring_df.groupby(['Date', 'Category'])['Amount'].sum().reset_index()
+        # Group by date and category, summing exact cents
+        daily_expenses = recurring_df.groupby(['Date', 'Category'], observed=True)['Cents'].sum().reset_index()
+        daily_expenses['Amount'] = to_dollars(daily_expenses['Cents'])
         
         # Create scatter plot with dates
         fig = go.Figure()
@@ -1504,8 +1917,7 @@ class StreamlitBankAnalyzer:
         """Create detailed table view of recurring expenses with dates and amounts."""
         recurring_categories = ['Subscriptions', 'Utilities', 'Gas & Fuel', 'Groceries', 'Insurance', 'Housing']
         
-        expenses_df = df[df['Amount'] < 0].copy()
-        expenses_df['Amount'] = expenses_df['Amount'].abs()
+        expenses_df = expenses_of(df)
         
         # Filter for recurring categories
         recurring_df = expenses_df[expenses_df['Category'].isin(recurring_categories)]
@@ -1513,14 +1925,22 @@ class StreamlitBankAnalyzer:
         if len(recurring_df) == 0:
             return None
         
-        # Group by merchant/description to identify recurring patterns
-        merchant_analysis = recurring_df.groupby(['Description', 'Category']).agg({
-            'Amount': ['mean', 'count', 'sum', 'std'],
-            'Date': ['min', 'max']
-        }).round(2)
-        
-        # Flatten column names
-        merchant_analysis.columns = ['Avg_Amount', 'Frequency', 'Total_Spent', 'Amount_Variance', 'First_Payment', 'Last_Payment']
+        # Group by merchant/description to identify recurring patterns; totals are summed in exact cents
+        merchant_stats = recurring_df.groupby(['Description', 'Category'], observed=True).agg(
+            cents=('Cents', 'sum'),
+            count=('Cents', 'count'),
+            std=('Amount', 'std'),
+            first=('Date', 'min'),
+            last=('Date', 'max')
+        )
+        merchant_analysis = pd.DataFrame({
+            'Avg_Amount': to_dollars(merchant_stats['cents'] / merchant_stats['count']).round(2),
+            'Frequency': merchant_stats['count'],
+            'Total_Spent': to_dollars(merchant_stats['cents']),
+            'Amount_Variance': merchant_stats['std'].round(2),
+            'First_Payment': merchant_stats['first'],
+            'Last_Payment': merchant_stats['last']
+        })
         
         # Calculate monthly frequency and next expected payment
         merchant_analysis['Days_Between_Payments'] = (
@@ -1562,8 +1982,7 @@ class StreamlitBankAnalyzer:
         """Create a detailed payment schedule table showing all recurring payment dates."""
         recurring_categories = ['Subscriptions', 'Utilities', 'Gas & Fuel', 'Insurance']
         
-        expenses_df = df[df['Amount'] < 0].copy()
-        expenses_df['Amount'] = expenses_df['Amount'].abs()
+        expenses_df = expenses_of(df)
         
         # Filter for recurring categories and focus on likely recurring payments
         recurring_df = expenses_df[expenses_df['Category'].isin(recurring_categories)]
@@ -1572,7 +1991,7 @@ class StreamlitBankAnalyzer:
             return None
         
         # Group to find merchants with multiple payments
-        merchant_counts = recurring_df.groupby('Description').size()
+        merchant_counts = recurring_df.groupby('Description', observed=True).size()
         recurring_merchants = merchant_counts[merchant_counts >= 2].index
         
         # Filter for only recurring merchants
@@ -1584,7 +2003,7 @@ class StreamlitBankAnalyzer:
         # Add useful columns for schedule analysis
         schedule_df['Day_of_Month'] = schedule_df['Date'].dt.day
         schedule_df['Month_Year'] = schedule_df['Date'].dt.strftime('%Y-%m')
-        schedule_df['Days_Since_Last'] = schedule_df.groupby('Description')['Date'].diff().dt.days
+        schedule_df['Days_Since_Last'] = schedule_df.groupby('Description', observed=True)['Date'].diff().dt.days
         
         # Sort by merchant and date
         schedule_df = schedule_df.sort_values(['Description', 'Date'])
@@ -1605,11 +2024,13 @@ class StreamlitBankAnalyzer:
             # Try to load from file first
             subscriptions = self.load_from_file("manual_subscriptions.json", [])
             st.session_state.manual_subscriptions = subscriptions
+            self.bump_data_version('manual_subscriptions')
         return st.session_state.manual_subscriptions
     
     def save_manual_subscriptions(self, subscriptions):
         """Save manually entered subscriptions to session state and file."""
         st.session_state.manual_subscriptions = subscriptions
+        self.bump_data_version('manual_subscriptions')
         # Auto-save to file if persistence is enabled
         self.save_to_file("manual_subscriptions.json", subscriptions)
     
@@ -1842,11 +2263,13 @@ class StreamlitBankAnalyzer:
             # Try to load from file first
             expenses = self.load_from_file("manual_expenses.json", [])
             st.session_state.manual_expenses = expenses
+            self.bump_data_version('manual_expenses')
         return st.session_state.manual_expenses
     
     def save_manual_expenses(self, expenses):
         """Save manually entered expenses to session state and file."""
         st.session_state.manual_expenses = expenses
+        self.bump_data_version('manual_expenses')
         # Auto-save to file if persistence is enabled
         self.save_to_file("manual_expenses.json", expenses)
     
@@ -1938,6 +2361,7 @@ class StreamlitBankAnalyzer:
                     existing_expenses = self.load_manual_expenses()
                     existing_expenses.append(new_expense)
                     self.save_manual_expenses(existing_expenses)
+                    self.record_rollup_append([new_expense])
                     
                     st.success(f"✅ Added {expense_type.lower()}: ${expense_amount:.2f} for {expense_description}")
                     st.rerun()
@@ -1976,11 +2400,12 @@ class StreamlitBankAnalyzer:
             
             col1, col2, col3, col4 = st.columns(4)
             
-            total_expenses = df[df['Amount'] < 0]['Amount'].sum()
-            total_income = df[df['Amount'] > 0]['Amount'].sum()
+            # Exact totals in cents; entries without a valid amount count as zero
+            cents = to_cents(df['Amount']).fillna(0).to_numpy(dtype=np.int64)
+            total_expenses = to_dollars(cents[cents < 0].sum())
+            total_income = to_dollars(cents[cents > 0].sum())
             total_entries = len(df)
-            this_month = df[df['Date'].dt.month == datetime.now().month]
-            this_month_total = this_month['Amount'].sum()
+            this_month_total = to_dollars(cents[(df['Date'].dt.month == datetime.now().month).to_numpy()].sum())
             
             with col1:
                 st.metric("💸 Total Expenses", f"${abs(total_expenses):,.2f}")
@@ -2015,12 +2440,25 @@ class StreamlitBankAnalyzer:
                 if st.button("🗑️ Clear All Manual Entries", type="secondary"):
                     if st.button("⚠️ Confirm Delete All Manual Entries"):
                         st.session_state.manual_expenses = []
+                        self.bump_data_version('manual_expenses')
                         st.success("✅ All manual entries cleared!")
                         st.rerun()
         
         else:
             st.info("📝 No manual expenses added yet. Use the form above to add your first expense.")
     
+    def manual_expenses_frame(self, manual_expenses):
+        """Manual expense records as transaction rows in the CSV format."""
+        manual_df = pd.DataFrame(manual_expenses)
+        manual_df['Date'] = pd.to_datetime(manual_df['Date'])
+        manual_df = manual_df[to_cents(manual_df['Amount']).notna().to_numpy()].copy()
+        add_money_columns(manual_df)
+        manual_df['Month'] = manual_df['Date'].dt.to_period('M')
+        manual_df['Source'] = 'Manual Entry'
+        
+        # Select only the columns we need to match CSV format
+        return manual_df[['Date', 'Description', 'Amount', 'Category', 'Type', 'Month', 'Source', 'Cents', 'Sign']]
+    
     def combine_all_transactions(self, csv_df):
         """Combine CSV data with manual expenses and grocery items for comprehensive analysis."""
         all_transactions = []
@@ -2034,14 +2472,7 @@ class StreamlitBankAnalyzer:
         # Add manual expenses
         manual_expenses = self.load_manual_expenses()
         if manual_expenses:
-            manual_df = pd.DataFrame(manual_expenses)
-            manual_df['Date'] = pd.to_datetime(manual_df['Date'])
-            manual_df['Month'] = manual_df['Date'].dt.to_period('M')
-            manual_df['Source'] = 'Manual Entry'
-            
-            # Select only the columns we need to match CSV format
-            manual_df = manual_df[['Date', 'Description', 'Amount', 'Category', 'Type', 'Month', 'Source']]
-            all_transactions.append(manual_df)
+            all_transactions.append(self.manual_expenses_frame(manual_expenses))
         
         # Add grocery items as transactions
         grocery_items = self.load_grocery_items()
@@ -2050,17 +2481,22 @@ class StreamlitBankAnalyzer:
             grocery_df['Date'] = pd.to_datetime(grocery_df['date'])
             grocery_df['Description'] = grocery_df['item_name'] + ' @ ' + grocery_df['store']
             grocery_df['Amount'] = -grocery_df['price']  # Groceries are expenses
+            grocery_df = grocery_df[to_cents(grocery_df['Amount']).notna().to_numpy()].copy()
+            add_money_columns(grocery_df)
             grocery_df['Category'] = 'Groceries - ' + grocery_df['category']  # Subcategorize
             grocery_df['Type'] = 'Expense'
             grocery_df['Month'] = grocery_df['Date'].dt.to_period('M')
             grocery_df['Source'] = 'Grocery Receipt'
             
             # Select only the columns we need
-            grocery_df = grocery_df[['Date', 'Description', 'Amount', 'Category', 'Type', 'Month', 'Source']]
+            grocery_df = grocery_df[['Date', 'Description', 'Amount', 'Category', 'Type', 'Month', 'Source', 'Cents', 'Sign']]
             all_transactions.append(grocery_df)
         
-        # Combine all dataframes
+        # Combine all dataframes, keeping a transaction recorded by more than one source once
         if all_transactions:
+            all_transactions, removed = deduplicate_statements(all_transactions)
+            if removed:
+                st.info(f"🧹 Skipped {removed} duplicate transactions found in more than one source")
             combined_df = pd.concat(all_transactions, ignore_index=True)
             combined_df = combined_df.sort_values('Date', ascending=False)
             return combined_df
@@ -2073,68 +2509,25 @@ class StreamlitBankAnalyzer:
             # Try to load from file first
             items = self.load_from_file("grocery_items.json", [])
             st.session_state.grocery_items = items
+            self.bump_data_version('grocery_items')
         return st.session_state.grocery_items
     
     def save_grocery_items(self, items):
         """Save grocery items to session state and file."""
         st.session_state.grocery_items = items
+        self.bump_data_version('grocery_items')
         # Auto-save to file if persistence is enabled
         self.save_to_file("grocery_items.json", items)
     
     def categorize_grocery_item(self, item_name):
         """Categorize grocery items into specific categories."""
-        item_lower = str(item_name).lower()
-        
-        # Define grocery categories with keywords
-        categories = {
-            'Vegetables': [
-                'lettuce', 'tomato', 'onion', 'carrot', 'celery', 'pepper', 'broccoli', 
-                'spinach', 'cucumber', 'potato', 'sweet potato', 'corn', 'peas', 'beans',
-                'cabbage', 'cauliflower', 'zucchini', 'squash', 'eggplant', 'mushroom',
-                'avocado', 'garlic', 'ginger', 'kale', 'arugula', 'radish', 'turnip'
-            ],
-            'Fruits': [
-                'apple', 'banana', 'orange', 'grape', 'strawberry', 'blueberry', 'cherry',
-                'peach', 'pear', 'pineapple', 'mango', 'watermelon', 'cantaloupe', 'kiwi',
-                'lemon', 'lime', 'grapefruit', 'raspberry', 'blackberry', 'plum', 'apricot'
-            ],
-            'Dairy & Milk': [
-                'milk', 'yogurt', 'cheese', 'butter', 'cream', 'sour cream', 'cottage cheese',
-                'greek yogurt', 'almond milk', 'soy milk', 'oat milk', 'coconut milk',
-                'whipped cream', 'half and half', 'heavy cream', 'mozzarella', 'cheddar'
-            ],
-            'Snacks': [
-                'chips', 'crackers', 'cookies', 'candy', 'chocolate', 'nuts', 'popcorn',
-                'pretzels', 'granola bar', 'trail mix', 'gum', 'mints', 'ice cream',
-                'frozen yogurt', 'cake', 'pie', 'donut', 'pastry', 'brownie', 'snack'
-            ],
-            'Meat & Protein': [
-                'chicken', 'beef', 'pork', 'fish', 'salmon', 'tuna', 'turkey', 'ham',
-                'bacon', 'sausage', 'eggs', 'tofu', 'tempeh', 'beans', 'lentils',
-                'ground beef', 'steak', 'ribs', 'lamb', 'shrimp', 'crab', 'lobster'
-            ],
-            'Bread & Grains': [
-                'bread', 'bagel', 'muffin', 'cereal', 'oatmeal', 'rice', 'pasta', 'noodles',
-                'flour', 'quinoa', 'barley', 'wheat', 'rolls', 'tortilla', 'pita',
-                'crackers', 'granola', 'cornmeal', 'couscous'
-            ],
-            'Beverages': [
-                'juice', 'soda', 'water', 'coffee', 'tea', 'beer', 'wine', 'energy drink',
-                'sports drink', 'kombucha', 'coconut water', 'sparkling water', 'lemonade'
-            ],
-            'Household & Other': [
-                'detergent', 'soap', 'shampoo', 'toothpaste', 'toilet paper', 'paper towel',
-                'cleaning', 'dish soap', 'laundry', 'trash bag', 'aluminum foil', 'plastic wrap'
-            ]
-        }
-        
-        # Check each category
-        for category, keywords in categories.items():
-            for keyword in keywords:
-                if keyword in item_lower:
-                    return category
-        
-        return 'Other'
+        return GROCERY_CATEGORIZER.categorize(item_name)
+    
+    def categorize_grocery_items(self, item_names):
+        """Categorize many grocery item names at once (whole receipts, back-filling saved items)."""
+        if len(item_names) == 0:
+            return []
+        return list(GROCERY_CATEGORIZER.categorize_descriptions(item_names).astype(object))
     
     def preprocess_receipt_image(self, image):
         """Preprocess receipt image for better OCR results."""
@@ -2236,14 +2629,12 @@ class StreamlitBankAnalyzer:
                     item_text = re.sub(r'\s+', ' ', item_text)      # Normalize spaces
                     
                     if len(item_text) > 2 and price > 0:  # Valid item
-                        category = self.categorize_grocery_item(item_text)
-                        
                         items.append({
                             'id': f"{receipt_date}_{store_name}_{len(items)}_{datetime.now().timestamp()}",
                             'date': receipt_date,
                             'store': store_name,
                             'item_name': item_text,
-                            'category': category,
+                            'category': None,
                             'price': price,
                             'created_at': datetime.now()
                         })
@@ -2251,6 +2642,11 @@ class StreamlitBankAnalyzer:
                         total_amount += price
                     break
         
+        # Categorize the whole receipt in one pass
+        categories = self.categorize_grocery_items([item['item_name'] for item in items])
+        for item, category in zip(items, categories):
+            item['category'] = category
+        
         return items, total_amount
     
     def manage_grocery_receipts(self):
@@ -2474,6 +2870,7 @@ class StreamlitBankAnalyzer:
                     if st.button("🗑️ Clear All Grocery Data", type="secondary"):
                         if st.button("⚠️ Confirm Delete All", type="secondary"):
                             st.session_state.grocery_items = []
+                            self.bump_data_version('grocery_items')
                             st.success("✅ All grocery data cleared!")
                             st.rerun()
                 
@@ -2751,16 +3148,18 @@ class StreamlitBankAnalyzer:
         return upcoming_payments
     
     def initialize_users(self):
-        """Initialize default users and load from persistent storage."""
-        # Load users from file if they exist
-        users_data = self.load_users_from_file()
+        """Point the session at the shared user registry, creating the default users on first start."""
+        try:
+            users = self.user_registry.snapshot()
+        except Exception as e:
+            st.error(f"Error loading users: {e}")
+            users = {}
         
-        if not users_data:
+        if not users:
             # Create default users if file doesn't exist
-            admin_password = bcrypt.hashpw("admin123".encode('utf-8'), bcrypt.gensalt())
-            test_password = bcrypt.hashpw("test123".encode('utf-8'), bcrypt.gensalt())
+            admin_password, test_password = password_hasher.hash_many(["admin123", "test123"], st.session_state.bcrypt_rounds)
             
-            users_data = {
+            default_users = {
                 'admin': {
                     'password_hash': admin_password.decode('utf-8'),
                     'role': 'admin',
@@ -2775,63 +3174,37 @@ class StreamlitBankAnalyzer:
                     'is_test_user': True
                 }
             }
-            self.save_users_to_file(users_data)
-        
-        # Convert password hashes back to bytes for session state
-        for username, user_info in users_data.items():
-            if isinstance(user_info['password_hash'], str):
-                user_info['password_hash'] = user_info['password_hash'].encode('utf-8')
-            if isinstance(user_info['created_at'], str):
-                user_info['created_at'] = datetime.fromisoformat(user_info['created_at'])
-        
-        st.session_state.users = users_data
-    
-    def load_users_from_file(self):
-        """Load users from persistent file storage."""
-        users_file = self.data_dir / "users.json"
-        if users_file.exists():
+            
+            def add_defaults(current):
+                # Another session may have created them while we were hashing
+                if not current:
+                    current.update(default_users)
             try:
-                with open(users_file, 'r') as f:
-                    return json.load(f)
+                users = self.user_registry.update(add_defaults)
             except Exception as e:
-                st.error(f"Error loading users: {e}")
-                return {}
-        return {}
+                st.error(f"Error saving users: {e}")
+        
+        # Read-only snapshot shared with every other session
+        st.session_state.users = users
     
     def save_users_to_file(self, users_data=None):
-        """Save users to persistent file storage."""
+        """Replace the shared user registry, and with it users.json, with users_data."""
         if users_data is None:
             users_data = st.session_state.get('users', {})
         
-        # Convert data for JSON serialization
-        serializable_users = {}
-        for username, user_info in users_data.items():
-            serializable_users[username] = {
-                'password_hash': user_info['password_hash'].decode('utf-8') if isinstance(user_info['password_hash'], bytes) else user_info['password_hash'],
-                'role': user_info['role'],
-                'created_at': user_info['created_at'].isoformat() if isinstance(user_info['created_at'], datetime) else user_info['created_at'],
-                'permissions': user_info['permissions'],
-                'is_test_user': user_info.get('is_test_user', False)
-            }
-        
-        users_file = self.data_dir / "users.json"
         try:
-            with open(users_file, 'w') as f:
-                json.dump(serializable_users, f, indent=2)
+            st.session_state.users = self.user_registry.replace(users_data)
         except Exception as e:
             st.error(f"Error saving users: {e}")
     
     def authenticate_user(self, username, password):
         """Authenticate user credentials."""
-        if 'users' not in st.session_state:
-            self.initialize_users()
+        # Check the shared registry so users created in other sessions can log in right away
+        self.initialize_users()
         
         users = st.session_state.users
         if username in users:
-            stored_hash = users[username]['password_hash']
-            if isinstance(stored_hash, str):
-                stored_hash = stored_hash.encode('utf-8')
-            if bcrypt.checkpw(password.encode('utf-8'), stored_hash):
+            if password_hasher.verify(password, users[username]['password_hash']):
                 return True
         return False
     
@@ -2843,18 +3216,23 @@ class StreamlitBankAnalyzer:
         if permissions is None:
             permissions = ['read', 'write']
         
-        password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+        password_hash = password_hasher.hash(password, st.session_state.bcrypt_rounds)
         
-        st.session_state.users[username] = {
-            'password_hash': password_hash,
-            'role': role,
-            'created_at': datetime.now(),
-            'permissions': permissions,
-            'is_test_user': False
-        }
+        def add_user(users):
+            users[username] = {
+                'password_hash': password_hash,
+                'role': role,
+                'created_at': datetime.now(),
+                'permissions': permissions,
+                'is_test_user': False
+            }
         
-        # Save to persistent storage
-        self.save_users_to_file()
+        # Save to the shared registry and persistent storage
+        try:
+            st.session_state.users = self.user_registry.update(add_user)
+        except Exception as e:
+            st.error(f"Error saving users: {e}")
+            return False
         
         # Setup automatic persistence for new user
         user_settings = {
@@ -2871,9 +3249,17 @@ class StreamlitBankAnalyzer:
         st.markdown("### 🔐 Login Required")
         st.markdown("**Please enter your credentials to access the Finance Analyzer**")
         
-        # Check if already logged in
+        # Check if already logged in; the session token was verified at login, so reruns skip bcrypt
         if 'authenticated' in st.session_state and st.session_state.authenticated:
-            return True
+            current_user = st.session_state.get('current_user')
+            user_info = st.session_state.get('users', {}).get(current_user)
+            if user_info is not None and verified_sessions.is_verified(current_user, st.session_state.get('auth_token'), user_info['password_hash']):
+                return True
+            # User deleted, password changed or session forgotten: ask for the password again
+            for key in ['authenticated', 'current_user', 'user_role', 'user_permissions', 'auth_token']:
+                if key in st.session_state:
+                    del st.session_state[key]
+            st.info("🔐 Your session has expired. Please log in again.")
         
         with st.form("login_form"):
             username = st.text_input("👤 Username", placeholder="Enter your username")
@@ -2889,6 +3275,7 @@ class StreamlitBankAnalyzer:
                     st.session_state.current_user = username
                     st.session_state.user_role = st.session_state.users[username]['role']
                     st.session_state.user_permissions = st.session_state.users[username]['permissions']
+                    st.session_state.auth_token = verified_sessions.issue(username, st.session_state.users[username]['password_hash'])
                     
                     # Setup user-specific persistence and load their data
                     self.setup_user_on_login(username)
@@ -2957,9 +3344,12 @@ class StreamlitBankAnalyzer:
     def save_user_settings(self, username, settings):
         """Save user-specific settings."""
         user_settings_file = self.data_dir / f"{username}_settings.json"
+        settings = dict(settings)
         try:
-            with open(user_settings_file, 'w') as f:
-                json.dump(settings, f, indent=2, default=str)
+            write_coalescer.submit(
+                str(user_settings_file),
+                lambda: atomic_write_json(user_settings_file, settings, indent=2, default=str)
+            )
         except Exception as e:
             st.error(f"Error saving settings for {username}: {e}")
     
@@ -2977,12 +3367,13 @@ class StreamlitBankAnalyzer:
         total_data_files = 0
         
         for user in all_users:
-            for data_type in ['manual_expenses', 'manual_subscriptions', 'grocery_items', 'settings']:
-                user_file = self.data_dir / f"{user}_{data_type}.json"
-                if user_file.exists():
+            for data_type in ['manual_expenses', 'manual_subscriptions', 'grocery_items']:
+                if self.storage.count(user, data_type) > 0:
                     total_data_files += 1
+            if (self.data_dir / f"{user}_settings.json").exists():
+                total_data_files += 1
         
-        st.info(f"📊 **System Status:**\n- {len(all_users)} total users\n- {total_data_files} data files on disk")
+        st.info(f"📊 **System Status:**\n- {len(all_users)} total users\n- {total_data_files} data sets stored")
         
         # Clear all user data (keep user accounts)
         col1, col2 = st.columns(2)
@@ -3011,14 +3402,10 @@ class StreamlitBankAnalyzer:
             if selected_user:
                 user_data_count = 0
                 for data_type in ['manual_expenses', 'manual_subscriptions', 'grocery_items']:
-                    user_file = self.data_dir / f"{selected_user}_{data_type}.json"
-                    if user_file.exists():
-                        try:
-                            with open(user_file, 'r') as f:
-                                data = json.load(f)
-                                user_data_count += len(data) if isinstance(data, list) else 1
-                        except:
-                            pass
+                    try:
+                        user_data_count += self.storage.count(selected_user, data_type)
+                    except Exception:
+                        pass
                 
                 st.info(f"📊 **{selected_user}**: {user_data_count} data items")
                 
@@ -3033,19 +3420,17 @@ class StreamlitBankAnalyzer:
     def clear_all_users_data(self):
         """Clear all user data files while preserving user accounts."""
         try:
-            data_types = ['manual_expenses', 'manual_subscriptions', 'grocery_items', 'settings']
             users = list(st.session_state.get('users', {}).keys())
             
             for user in users:
-                for data_type in data_types:
-                    user_file = self.data_dir / f"{user}_{data_type}.json"
-                    if user_file.exists():
-                        user_file.unlink()
+                self.storage.clear(user)
+                (self.data_dir / f"{user}_settings.json").unlink(missing_ok=True)
             
             # Clear session state for all users
             for key in ['manual_expenses', 'manual_subscriptions', 'grocery_items']:
                 if key in st.session_state:
                     st.session_state[key] = []
+                    self.bump_data_version(key)
                     
         except Exception as e:
             st.error(f"Error clearing user data: {e}")
@@ -3053,12 +3438,10 @@ class StreamlitBankAnalyzer:
     def clear_specific_user_data(self, username):
         """Clear data for a specific user."""
         try:
-            data_types = ['manual_expenses', 'manual_subscriptions', 'grocery_items', 'settings']
+            self.storage.clear(username)
+            (self.data_dir / f"{username}_settings.json").unlink(missing_ok=True)
             
-            for data_type in data_types:
-                user_file = self.data_dir / f"{username}_{data_type}.json"
-                if user_file.exists():
-                    user_file.unlink()
+            self.statement_cache.clear(username)
                     
         except Exception as e:
             st.error(f"Error clearing data for {username}: {e}")
@@ -3070,10 +3453,11 @@ class StreamlitBankAnalyzer:
             for file_path in self.data_dir.glob("*.json"):
                 if file_path.name != "users.json":  # Keep users.json for now
                     file_path.unlink()
+            self.storage.clear_all()
+            self.statement_cache.clear()
             
             # Reset users to just admin and test
-            admin_password = bcrypt.hashpw("admin123".encode('utf-8'), bcrypt.gensalt())
-            test_password = bcrypt.hashpw("test123".encode('utf-8'), bcrypt.gensalt())
+            admin_password, test_password = password_hasher.hash_many(["admin123", "test123"], st.session_state.bcrypt_rounds)
             
             fresh_users = {
                 'admin': {
@@ -3092,13 +3476,13 @@ class StreamlitBankAnalyzer:
                 }
             }
             
-            st.session_state.users = fresh_users
-            self.save_users_to_file()
+            self.save_users_to_file(fresh_users)
             
             # Clear session state
             for key in ['manual_expenses', 'manual_subscriptions', 'grocery_items']:
                 if key in st.session_state:
                     st.session_state[key] = []
+                    self.bump_data_version(key)
                     
         except Exception as e:
             st.error(f"Error during system reset: {e}")
@@ -3165,11 +3549,36 @@ class StreamlitBankAnalyzer:
             
             if st.button("🗑️ Delete User", type="secondary"):
                 if user_to_delete and user_to_delete not in ['admin', 'test']:
-                    del st.session_state.users[user_to_delete]
-                    self.save_users_to_file()  # Save changes
+                    try:
+                        st.session_state.users = self.user_registry.update(lambda users: users.pop(user_to_delete, None))
+                    except Exception as e:
+                        st.error(f"Error saving users: {e}")
+                        return
                     st.success(f"✅ User '{user_to_delete}' deleted!")
                     st.rerun()
     
+    def category_rules_interface(self):
+        """Interface for tuning transaction category keywords (admin only)."""
+        if not ('user_permissions' in st.session_state and 'admin' in st.session_state.user_permissions):
+            st.error("❌ Access denied. Admin privileges required.")
+            return
+        
+        categories = [c for c in self.category_keywords if c != 'Uncategorized']
+        category = st.selectbox("Category", options=categories, key="rule_category")
+        st.caption("Keywords: " + (", ".join(self.category_keywords[category]) or "none"))
+        keyword = st.text_input("Keyword", placeholder="e.g. trader joe", key="rule_keyword").strip()
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("➕ Add Keyword") and keyword:
+                changes = self.add_category_keyword(category, keyword)
+                st.success(f"✅ Added '{keyword}' to {category} ({len(changes)} descriptions recategorized)")
+        
+        with col2:
+            if st.button("➖ Remove Keyword") and keyword:
+                changes = self.remove_category_keyword(category, keyword)
+                st.success(f"✅ Removed '{keyword}' from {category} ({len(changes)} descriptions recategorized)")
+    
     def logout(self):
         """Logout current user and handle test user data clearing."""
         if st.sidebar.button("🚪 Logout"):
@@ -3180,7 +3589,9 @@ class StreamlitBankAnalyzer:
                 st.sidebar.success("🧹 Test user data cleared!")
             
             # Clear session authentication
-            for key in ['authenticated', 'current_user', 'user_role', 'user_permissions']:
+            if 'auth_token' in st.session_state:
+                verified_sessions.revoke(current_user, st.session_state.auth_token)
+            for key in ['authenticated', 'current_user', 'user_role', 'user_permissions', 'auth_token']:
                 if key in st.session_state:
                     del st.session_state[key]
             st.rerun()
@@ -3191,16 +3602,13 @@ class StreamlitBankAnalyzer:
         for key in ['manual_expenses', 'manual_subscriptions', 'grocery_items']:
             if key in st.session_state:
                 st.session_state[key] = []
+                self.bump_data_version(key)
         
-        # Clear test user's files if they exist
-        test_files = ["manual_expenses.json", "manual_subscriptions.json", "grocery_items.json"]
-        for filename in test_files:
-            filepath = self.data_dir / f"test_{filename}"
-            if filepath.exists():
-                try:
-                    filepath.unlink()
-                except Exception as e:
-                    pass  # Ignore errors when clearing test data
+        # Clear test user's stored data if there is any
+        try:
+            self.storage.clear('test')
+        except Exception as e:
+            pass  # Ignore errors when clearing test data
     
     def create_notification_dashboard(self, sms_config):
         """Create a dashboard showing upcoming payments and notification status for manual subscriptions."""
@@ -3333,9 +3741,8 @@ class StreamlitBankAnalyzer:
         insights = []
         
         # Top 3 expense categories
-        expenses_df = df[df['Amount'] < 0].copy()
-        expenses_df['Amount'] = expenses_df['Amount'].abs()
-        top_categories = expenses_df.groupby('Category')['Amount'].sum().sort_values(ascending=False).head(3)
+        expenses_df = expenses_of(df)
+        top_categories = to_dollars(expenses_df.groupby('Category', observed=True)['Cents'].sum()).sort_values(ascending=False).head(3)
         
         insights.append("🎯 **Top 3 Expense Categories:**")
         for i, (category, amount) in enumerate(top_categories.items(), 1):
@@ -3388,9 +3795,8 @@ class StreamlitBankAnalyzer:
     def create_and_save_pie_chart(self, df):
         """Create and save pie chart for PDF inclusion."""
         try:
-            expenses_df = df[df['Amount'] < 0].copy()
-            expenses_df['Amount'] = expenses_df['Amount'].abs()
-            category_spending = expenses_df.groupby('Category')['Amount'].sum().sort_values(ascending=False)
+            expenses_df = expenses_of(df)
+            category_spending = to_dollars(expenses_df.groupby('Category', observed=True)['Cents'].sum()).sort_values(ascending=False)
             
             if len(category_spending) == 0:
                 return False
@@ -3486,9 +3892,8 @@ class StreamlitBankAnalyzer:
             pdf.cell(0, 10, 'Top Spending Categories', 0, 1, 'L')
             pdf.ln(5)
             
-            expenses_df = df[df['Amount'] < 0].copy()
-            expenses_df['Amount'] = expenses_df['Amount'].abs()
-            top_categories = expenses_df.groupby('Category')['Amount'].sum().sort_values(ascending=False).head(3)
+            expenses_df = expenses_of(df)
+            top_categories = to_dollars(expenses_df.groupby('Category', observed=True)['Cents'].sum()).sort_values(ascending=False).head(3)
             
             pdf.set_font('Arial', 'B', 11)
             pdf.cell(10, 8, '#', 1, 0, 'C')
@@ -3576,7 +3981,7 @@ class StreamlitBankAnalyzer:
             # Create Excel writer object
             with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
                 # Sheet 1: Raw Transaction Data
-                df_export = df.copy()
+                df_export = display_transactions(df)
                 df_export['Date'] = df_export['Date'].dt.strftime('%Y-%m-%d')
                 df_export.to_excel(writer, sheet_name='Transaction Data', index=False)
                 
@@ -3594,33 +3999,31 @@ class StreamlitBankAnalyzer:
                 summary_df.to_excel(writer, sheet_name='Financial Summary', index=False)
                 
                 # Sheet 3: Category Analysis
-                expenses_df = df[df['Amount'] < 0].copy()
-                expenses_df['Amount'] = expenses_df['Amount'].abs()
-                category_analysis = expenses_df.groupby('Category').agg({
-                    'Amount': ['sum', 'mean', 'count']
-                }).round(2)
+                expenses_df = expenses_of(df)
+                category_analysis = cents_summary(expenses_df.groupby('Category', observed=True)['Cents']).round(2)
                 category_analysis.columns = ['Total Spent', 'Average Transaction', 'Transaction Count']
                 category_analysis['% of Total Expenses'] = (category_analysis['Total Spent'] / total_expenses * 100).round(1)
                 category_analysis = category_analysis.sort_values('Total Spent', ascending=False)
                 category_analysis.to_excel(writer, sheet_name='Category Analysis')
                 
-                # Sheet 4: Monthly Analysis
-                monthly_data = df.groupby('Month').agg({
-                    'Amount': lambda x: [x[x > 0].sum(), abs(x[x < 0].sum()), len(x)]
-                }).reset_index()
-                monthly_data['Income'] = monthly_data['Amount'].apply(lambda x: x[0])
-                monthly_data['Expenses'] = monthly_data['Amount'].apply(lambda x: x[1])
+                # Sheet 4: Monthly Analysis (income and expenses summed in exact cents)
+                cents, signs = cents_of(df), signs_of(df)
+                monthly_data = pd.DataFrame({
+                    'Income': cents.where(signs > 0, 0),
+                    'Expenses': -cents.where(signs < 0, 0),
+                    'Transaction Count': 1
+                }).groupby(month_periods(df['MonthKey'])).sum().reset_index()
+                monthly_data['Income'] = to_dollars(monthly_data['Income'])
+                monthly_data['Expenses'] = to_dollars(monthly_data['Expenses'])
                 monthly_data['Savings'] = monthly_data['Income'] - monthly_data['Expenses']
                 monthly_data['Savings Rate (%)'] = ((monthly_data['Savings'] / monthly_data['Income']) * 100).round(1)
-                monthly_data['Transaction Count'] = monthly_data['Amount'].apply(lambda x: x[2])
                 monthly_data = monthly_data[['Month', 'Income', 'Expenses', 'Savings', 'Savings Rate (%)', 'Transaction Count']]
                 monthly_data['Month'] = monthly_data['Month'].astype(str)
                 monthly_data.to_excel(writer, sheet_name='Monthly Analysis', index=False)
                 
                 # Sheet 5: Top Transactions
-                top_income = df[df['Amount'] > 0].nlargest(10, 'Amount')[['Date', 'Description', 'Amount', 'Category']]
-                top_expenses = df[df['Amount'] < 0].nsmallest(10, 'Amount')[['Date', 'Description', 'Amount', 'Category']]
-                top_expenses['Amount'] = top_expenses['Amount'].abs()
+                top_income = df[(signs_of(df) > 0).to_numpy()].nlargest(10, 'Cents')[['Date', 'Description', 'Amount', 'Category']]
+                top_expenses = expenses_of(df).nlargest(10, 'Cents')[['Date', 'Description', 'Amount', 'Category']]
                 
                 # Create a combined sheet for top transactions
                 top_transactions = pd.DataFrame()
@@ -3641,29 +4044,26 @@ class StreamlitBankAnalyzer:
                 
                 # Sheet 6: Recurring Expenses Analysis
                 recurring_categories = ['Subscriptions', 'Utilities', 'Gas & Fuel', 'Groceries', 'Insurance', 'Housing']
-                expenses_df_recurring = df[df['Amount'] < 0].copy()
-                expenses_df_recurring['Amount'] = expenses_df_recurring['Amount'].abs()
+                expenses_df_recurring = expenses_of(df)
                 recurring_expenses = expenses_df_recurring[expenses_df_recurring['Category'].isin(recurring_categories)]
                 
                 if len(recurring_expenses) > 0:
                     # Monthly recurring breakdown
                     recurring_monthly = recurring_expenses.groupby([
                         recurring_expenses['Date'].dt.to_period('M'), 'Category'
-                    ])['Amount'].sum().reset_index()
+                    ], observed=True)['Cents'].sum().reset_index()
+                    recurring_monthly['Amount'] = to_dollars(recurring_monthly['Cents'])
                     recurring_monthly['Month'] = recurring_monthly['Date'].astype(str)
                     recurring_monthly = recurring_monthly[['Month', 'Category', 'Amount']]
                     recurring_monthly.to_excel(writer, sheet_name='Recurring Expenses', index=False)
                 
                 # Sheet 7: YTD Summary by Category
                 current_year = df['Date'].dt.year.max()
-                ytd_expenses = df[(df['Date'].dt.year == current_year) & (df['Amount'] < 0)].copy()
-                ytd_expenses['Amount'] = ytd_expenses['Amount'].abs()
+                ytd_expenses = expenses_df_recurring[expenses_df_recurring['Date'].dt.year == current_year]
                 
                 if len(ytd_expenses) > 0:
-                    ytd_summary = ytd_expenses.groupby('Category').agg({
-                        'Amount': ['sum', 'mean', 'count'],
-                        'Date': ['min', 'max']
-                    }).round(2)
+                    ytd_groups = ytd_expenses.groupby('Category', observed=True)
+                    ytd_summary = cents_summary(ytd_groups['Cents']).join(ytd_groups['Date'].agg(['min', 'max'])).round(2)
                     ytd_summary.columns = ['Total_Spent', 'Avg_Transaction', 'Transaction_Count', 'First_Transaction', 'Last_Transaction']
                     ytd_summary['Monthly_Average'] = (ytd_summary['Total_Spent'] / 
                                                     len(ytd_expenses['Date'].dt.to_period('M').unique())).round(2)
@@ -3673,10 +4073,8 @@ class StreamlitBankAnalyzer:
                 # Sheet 8: Subscription Details
                 subscription_expenses = expenses_df_recurring[expenses_df_recurring['Category'] == 'Subscriptions']
                 if len(subscription_expenses) > 0:
-                    subscription_details = subscription_expenses.groupby('Description').agg({
-                        'Amount': ['sum', 'mean', 'count'],
-                        'Date': ['min', 'max']
-                    }).round(2)
+                    subscription_groups = subscription_expenses.groupby('Description', observed=True)
+                    subscription_details = cents_summary(subscription_groups['Cents']).join(subscription_groups['Date'].agg(['min', 'max'])).round(2)
                     subscription_details.columns = ['Total_Cost', 'Avg_Cost', 'Frequency', 'First_Seen', 'Last_Seen']
                     subscription_details['Annual_Projection'] = (subscription_details['Total_Cost'] * 
                                                                (365 / subscription_details['Frequency'])).round(2)
@@ -3685,13 +4083,13 @@ class StreamlitBankAnalyzer:
                 
                 # Sheet 9: Detailed Payment Schedule
                 schedule_df = expenses_df_recurring.copy()
-                merchant_counts = schedule_df.groupby('Description').size()
+                merchant_counts = schedule_df.groupby('Description', observed=True).size()
                 recurring_merchants = merchant_counts[merchant_counts >= 2].index
                 detailed_schedule = schedule_df[schedule_df['Description'].isin(recurring_merchants)].copy()
                 
                 if len(detailed_schedule) > 0:
                     detailed_schedule['Day_of_Month'] = detailed_schedule['Date'].dt.day
-                    detailed_schedule['Days_Since_Last'] = detailed_schedule.groupby('Description')['Date'].diff().dt.days
+                    detailed_schedule['Days_Since_Last'] = detailed_schedule.groupby('Description', observed=True)['Date'].diff().dt.days
                     detailed_schedule = detailed_schedule.sort_values(['Description', 'Date'])
                     
                     export_schedule = detailed_schedule[['Date', 'Description', 'Category', 'Amount', 'Day_of_Month', 'Days_Since_Last']].copy()
@@ -3731,6 +4129,12 @@ def main():
             
             with st.sidebar.expander("🗑️ System Data Management (Admin Only)"):
                 analyzer.admin_data_management_interface()
+            
+            with st.sidebar.expander("🏷️ Category Rules (Admin Only)"):
+                analyzer.category_rules_interface()
+            
+            with st.sidebar.expander("🩺 Cache Diagnostics (Admin Only)"):
+                analyzer.cache_diagnostics_interface()
         
         # Data persistence settings
         analyzer.setup_persistence_settings()
@@ -3819,14 +4223,10 @@ def main():
     
     # Always process data (CSV + manual entries)
     try:
-        df = None
-        if uploaded_file is not None:
-            # Read the CSV file
-            df = pd.read_csv(uploaded_file)
-            st.success(f"✅ File uploaded successfully! Found {len(df)} transactions.")
-        
-        # Process the data (includes manual entries even without CSV)
-        processed_df = analyzer.process_dataframe(df)
+        # Process the data (includes manual entries even without CSV), reused while nothing changed
+        processed_df, csv_rows, data_key = analyzer.get_processed_data(uploaded_file)
+        if csv_rows is not None:
+            st.success(f"✅ File uploaded successfully! Found {csv_rows} transactions.")
         
         # Show data source summary
         if processed_df is not None and len(processed_df) > 0:
@@ -3851,20 +4251,6 @@ def main():
                     help="Filter transactions by date range"
                 )
                 
-                # Apply date filter
-                if len(date_range) == 2:
-                    start_date, end_date = date_range
-                    filtered_df = processed_df[
-                        (processed_df['Date'].dt.date >= start_date) & 
-                        (processed_df['Date'].dt.date <= end_date)
-                    ].copy()
-                    
-                    if len(filtered_df) == 0:
-                        st.warning("⚠️ No transactions found in the selected date range.")
-                        filtered_df = processed_df
-                else:
-                    filtered_df = processed_df
-                
                 # Add category filter
                 available_categories = processed_df['Category'].unique().tolist()
                 selected_categories = st.sidebar.multiselect(
@@ -3874,9 +4260,13 @@ def main():
                     help="Select categories to include in analysis"
                 )
                 
-                # Apply category filter
-                if selected_categories:
-                    filtered_df = filtered_df[filtered_df['Category'].isin(selected_categories)]
+                # Apply date and category filters
+                filtered_df, date_range_was_empty = analyzer.get_filtered_data(
+                    processed_df, data_key, date_range, selected_categories
+                )
+                if date_range_was_empty:
+                    st.warning("⚠️ No transactions found in the selected date range.")
+                rollups = analyzer.get_rollups(processed_df, data_key, date_range, selected_categories)
                 
                 # Show filter info
                 if len(filtered_df) != len(processed_df):
@@ -3887,8 +4277,9 @@ def main():
                 # Setup SMS notifications
                 sms_config = analyzer.setup_sms_notifications()
                 
-                # Calculate metrics using filtered data
-                total_income, total_expenses, total_savings, savings_rate = analyzer.calculate_metrics(filtered_df)
+                # Calculate metrics and monthly budget using filtered data
+                metrics, budget_info = analyzer.get_overview(filtered_df, data_key, date_range, selected_categories, rollups)
+                total_income, total_expenses, total_savings, savings_rate = metrics
                 
                 # Display metrics
                 st.markdown('<div class="chart-header">📊 Financial Overview</div>', unsafe_allow_html=True)
@@ -3927,8 +4318,6 @@ def main():
                 # Monthly Budget Overview
                 st.markdown('<div class="chart-header">💰 Monthly Budget Overview</div>', unsafe_allow_html=True)
                 
-                budget_info = analyzer.calculate_monthly_disposable_income(filtered_df)
-                
                 # Create alert based on disposable income
                 if budget_info['disposable_income'] > 0:
                     budget_status = "positive"
@@ -3997,13 +4386,14 @@ def main():
                 
                 # Category spending chart (full width)
                 st.subheader("💰 Category Spending Analysis")
-                category_chart = analyzer.create_category_spending_chart(filtered_df)
+                filter_key = (tuple(date_range), tuple(selected_categories))
+                category_chart = analyzer.get_chart('category_spending_chart', filtered_df, data_key, filter_key)
                 if category_chart:
                     st.plotly_chart(category_chart, use_container_width=True)
                 
                 # Monthly trends chart (full width)
                 st.subheader("📊 Monthly Trends & Savings Rate")
-                monthly_chart = analyzer.create_monthly_trends_chart(filtered_df)
+                monthly_chart = analyzer.get_chart('monthly_trends_chart', filtered_df, data_key, filter_key, rollups)
                 if monthly_chart:
                     st.plotly_chart(monthly_chart, use_container_width=True)
                 
@@ -4094,7 +4484,7 @@ def main():
                 with report_tab2:
                     # Data preview
                     st.markdown("#### 📋 Filtered Transaction Data")
-                    st.dataframe(filtered_df, use_container_width=True)
+                    st.dataframe(display_transactions(filtered_df), use_container_width=True)
         
     except Exception as e:
         st.error(f"❌ Error reading file: {e}")
@@ -0,0 +1,299 @@
+import argparse
+import json
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from aggregation import AggregationCube
+from categorizer import DescriptionCache, get_categorizer
+from dedup import TransactionHistory
+from main import BankStatementAnalyzer
+from money import add_money_columns
+from schema import compact_transactions, memory_report
+from storage import JournalStorage, JSONFileStorage, SQLiteStorage, WriteCoalescer, atomic_write_json
+
+
+def make_transactions(rows, seed=42, days=365 * 5):
+    """Build a synthetic statement spanning `days` days with realistic, heavily repeated merchant strings."""
+    rng = np.random.default_rng(seed)
+    merchants = np.array([
+        'PAYROLL DEPOSIT', 'WALMART SUPERCENTER', 'NETFLIX SUBSCRIPTION', 'SHELL GAS STATION',
+        'STARBUCKS COFFEE', 'AMAZON PURCHASE', 'ELECTRIC COMPANY', 'MCDONALDS', 'UBER RIDE',
+        'KROGER GROCERY', 'ATM WITHDRAWAL FEE', 'PHARMACY CVS', 'RENT PAYMENT', 'SPOTIFY PREMIUM',
+        'TARGET STORE', 'CHICK-FIL-A DINING', 'LYFT RIDE', 'INTERNET BILL', 'ZELLE TRANSFER',
+        'LOCAL HARDWARE STORE'
+    ])
+    descriptions = merchants[rng.integers(0, len(merchants), rows)]
+    # Suffix a store number to a share of rows so not every description repeats exactly.
+    store_numbers = rng.integers(0, 5000, rows).astype(str)
+    numbered = rng.random(rows) < 0.3
+    descriptions = np.where(numbered, np.char.add(np.char.add(descriptions, ' #'), store_numbers), descriptions)
+
+    return pd.DataFrame({
+        'Date': pd.Timestamp('2020-01-01') + pd.to_timedelta(rng.integers(0, days, rows), unit='D'),
+        'Description': descriptions,
+        'Amount': np.round(rng.normal(-50, 400, rows), 2),
+    })
+
+
+def make_categorized_transactions(rows, days=365 * 5):
+    """Synthetic statement with the Cents, Sign, Category, Type, Month and Source columns the analyzers add."""
+    df = add_money_columns(make_transactions(rows, days=days))
+    analyzer = BankStatementAnalyzer(None)
+    df['Category'] = get_categorizer(analyzer.category_keywords).categorize_descriptions(df['Description']).astype(object)
+    df['Type'] = np.where(df['Sign'] > 0, 'Income', 'Expense')
+    df['Month'] = df['Date'].dt.to_period('M')
+    df['Source'] = 'CSV Upload'
+    return df
+
+
+def loop_categorize(description, category_keywords):
+    """The original nested keyword loops categorize_transaction ran before the compiled categorizer; the baseline."""
+    description_lower = description.lower()
+    for category, keywords in category_keywords.items():
+        if category == 'Uncategorized':
+            continue
+        for keyword in keywords:
+            if keyword in description_lower:
+                return category
+    return 'Uncategorized'
+
+
+def timed(label, func, *args):
+    """Run func once and print how long it took."""
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    print(f"{label:40}: {elapsed:8.3f}s")
+    return result, elapsed
+
+
+def benchmark_categorization(rows):
+    """Compare the original nested keyword loops against the per-row and vectorized categorizer paths."""
+    print(f"\n🏷️  CATEGORIZATION ({rows:,} rows)")
+    print("-" * 60)
+    df = make_transactions(rows)
+    analyzer = BankStatementAnalyzer(None)
+    categorizer = get_categorizer(analyzer.category_keywords)
+
+    baseline, baseline_time = timed("Series.apply(original keyword loops)", df['Description'].apply,
+                                     lambda description: loop_categorize(description, analyzer.category_keywords))
+    per_row, per_row_time = timed("Series.apply(categorize_transaction)", df['Description'].apply, analyzer.categorize_transaction)
+    batch, batch_time = timed("categorize_series", categorizer.categorize_series, df['Description'])
+
+    assert (per_row == baseline).all(), "Per-row categories differ from the original loops"
+    assert (baseline.to_numpy() == batch.astype(object)).all(), "Vectorized categories differ from the original loops"
+    print(f"Speedup vs original loops: {baseline_time / per_row_time:.1f}x per-row, {baseline_time / batch_time:.1f}x vectorized (results identical)")
+
+    cache = DescriptionCache(maxsize=len(df))
+    unique, unique_time = timed("categorize_descriptions (cold cache)", categorizer.categorize_descriptions, df['Description'], cache)
+    _, warm_time = timed("categorize_descriptions (warm cache)", categorizer.categorize_descriptions, df['Description'], cache)
+    assert (baseline.to_numpy() == unique.astype(object)).all(), "Memoized categories differ from the original loops"
+    print(f"Speedup vs original loops: {baseline_time / unique_time:.1f}x cold, {baseline_time / warm_time:.1f}x warm")
+
+    _, apply_type_time = timed("Type via Series.apply", df['Amount'].apply, lambda x: 'Income' if x > 0 else 'Expense')
+    _, where_type_time = timed("Type via np.where", np.where, df['Amount'] > 0, 'Income', 'Expense')
+    print(f"Speedup: {apply_type_time / where_type_time:.1f}x")
+
+
+def benchmark_dedup_merge(rows, statement_rows=5000):
+    """Time merging one statement into a persisted history of `rows` transactions.
+
+    Half of the statement overlaps rows already in the history, as with a
+    re-downloaded export.
+    """
+    print(f"\n🧬 DEDUP MERGE ({statement_rows:,} rows into a {rows:,}-row history)")
+    print("-" * 60)
+    history_dir = Path(tempfile.mkdtemp(prefix="bank_history_"))
+    history = TransactionHistory(history_dir)
+    existing = make_transactions(rows)
+    timed("initial merge", history.merge, existing)
+
+    fresh = make_transactions(statement_rows // 2, seed=7)
+    fresh['Date'] = fresh['Date'] + pd.Timedelta(days=365 * 5)
+    statement = pd.concat([existing.tail(statement_rows - len(fresh)), fresh], ignore_index=True)
+    added, _ = timed("merge statement", history.merge, statement)
+    assert added == len(fresh), f"Expected {len(fresh)} new rows, merged {added}"
+    print(f"{added:,} new rows kept, {len(statement) - added:,} duplicates dropped")
+    shutil.rmtree(history_dir, ignore_errors=True)
+
+
+def benchmark_month_comparison(rows, years=10, lookups=200):
+    """Time building the month x category comparison pivot, then individual month comparisons."""
+    print(f"\n📆 MONTH COMPARISON ({rows:,} rows over {years} years)")
+    print("-" * 60)
+    df = make_categorized_transactions(rows, days=365 * years)
+
+    def build():
+        return AggregationCube.from_frame(df).monthly_comparison()
+
+    comparison, _ = timed("cube + comparison pivot", build)
+    months = comparison.months
+    rng = np.random.default_rng(0)
+    pairs = rng.integers(0, len(months), (lookups, 2))
+    start = time.perf_counter()
+    for previous, current in pairs:
+        comparison.compare(months[previous], months[current])
+    compare_time = (time.perf_counter() - start) / lookups
+    start = time.perf_counter()
+    for month in months[-lookups:]:
+        comparison.against_baseline(month, 3)
+    baseline_time = (time.perf_counter() - start) / min(lookups, len(months))
+    print(f"{'compare(a, b), average':40}: {compare_time * 1000:8.2f}ms")
+    print(f"{'against_baseline(month), average':40}: {baseline_time * 1000:8.2f}ms")
+
+
+def chart_analyzer():
+    """A StreamlitBankAnalyzer for calling chart builders outside a Streamlit session."""
+    # Imported here rather than at the top: app.py configures the Streamlit page on import
+    from app import StreamlitBankAnalyzer
+    # Skip __init__, which sets up session state and the user data directory
+    return StreamlitBankAnalyzer.__new__(StreamlitBankAnalyzer)
+
+
+def benchmark_histogram(rows):
+    """Time the amount histogram and measure the figure payload sent to the browser."""
+    print(f"\n📊 AMOUNT HISTOGRAM ({rows:,} rows)")
+    print("-" * 60)
+    df = make_transactions(rows)
+    figure, _ = timed("create_amount_histogram", chart_analyzer().create_amount_histogram, df)
+    payload, _ = timed("figure to_json", figure.to_json)
+    print(f"Figure payload: {len(payload) / 1024:,.1f} KB")
+
+
+def benchmark_timeline(rows):
+    """Time the level-of-detail transaction timeline and measure its points and payload."""
+    print(f"\n🕒 TRANSACTION TIMELINE ({rows:,} rows)")
+    print("-" * 60)
+    df = make_categorized_transactions(rows)
+    figure, _ = timed("create_transaction_timeline", chart_analyzer().create_transaction_timeline, df)
+    payload, _ = timed("figure to_json", figure.to_json)
+    points = sum(len(trace.x) for trace in figure.data)
+    print(f"Figure payload: {len(payload) / 1024:,.1f} KB with {points:,} points "
+          f"({', '.join(sorted({trace.type for trace in figure.data}))})")
+
+
+def benchmark_memory(rows):
+    """Compare the memory of the processed transaction frame before and after compact_transactions."""
+    print(f"\n🗜️  MEMORY LAYOUT ({rows:,} rows)")
+    print("-" * 60)
+    df = make_categorized_transactions(rows)
+
+    compact, _ = timed("compact_transactions", compact_transactions, df)
+    before, after = memory_report(df), memory_report(compact)
+    for column in dict.fromkeys([*before.index.drop('Total'), *after.index.drop('Total'), 'Total']):
+        print(f"{column:40}: {before.get(column, 0) / 1e6:8.1f} MB -> {after.get(column, 0) / 1e6:8.1f} MB")
+    print(f"Reduction: {before['Total'] / after['Total']:.1f}x")
+
+
+def benchmark_concurrent_saves(threads, saves):
+    """Hammer saves of one user's data and users.json from many threads while readers parse the files.
+
+    Fails if a reader ever sees a torn file or the final content is not one
+    of the lists that was saved.
+    """
+    print(f"\n🔒 CONCURRENT SAVES ({threads} threads x {saves} saves)")
+    print("-" * 60)
+    data_dir = Path(tempfile.mkdtemp(prefix="bank_stress_"))
+    backends = {
+        'json': JSONFileStorage(data_dir / "json"),
+        'journal': JournalStorage(data_dir / "journal", compact_threshold=50),
+        'sqlite': SQLiteStorage(data_dir / "sqlite" / "user_data.sqlite3")
+    }
+    users_file = data_dir / "users.json"
+    stop = threading.Event()
+    torn_reads = []
+
+    def read_files():
+        paths = [users_file, backends['json'].path('stress', 'grocery_items'), backends['journal'].path('stress', 'grocery_items')]
+        while not stop.is_set():
+            for path in paths:
+                if path.exists():
+                    try:
+                        with open(path, 'r') as f:
+                            json.load(f)
+                    except (json.JSONDecodeError, FileNotFoundError) as e:
+                        torn_reads.append((path.name, e))
+
+    for name, storage in backends.items():
+        coalescer = WriteCoalescer()
+        submitted = set()
+        submitted_lock = threading.Lock()
+
+        def hammer(worker):
+            for i in range(saves):
+                records = [{'id': f"item_{n}", 'Date': '2024-01-01', 'price': worker * saves + i} for n in range(i % 20 + 1)]
+                with submitted_lock:
+                    submitted.add(json.dumps(records))
+                coalescer.submit(('stress', 'grocery_items'), lambda records=records: storage.save('stress', 'grocery_items', records))
+                users = {f"user_{n}": {'role': 'user', 'saved_by': worker, 'save': i} for n in range(10)}
+                coalescer.submit(str(users_file), lambda users=users: atomic_write_json(users_file, users, indent=2))
+
+        stop.clear()
+        reader = threading.Thread(target=read_files)
+        reader.start()
+        workers = [threading.Thread(target=hammer, args=(worker,)) for worker in range(threads)]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+        stop.set()
+        reader.join()
+
+        final = json.dumps(storage.load('stress', 'grocery_items'))
+        assert final in submitted, f"{name}: final content was never saved"
+        stats = coalescer.stats()
+        print(f"{name:40}: {elapsed:8.3f}s, {stats['performed']} writes for {stats['submitted']} saves")
+
+    # Edit a loaded record in place and save it, as the subscription editor does,
+    # then read it back through a fresh instance that has to go to disk
+    reopen = {
+        'json': lambda: JSONFileStorage(data_dir / "json"),
+        'journal': lambda: JournalStorage(data_dir / "journal", compact_threshold=50),
+        'sqlite': lambda: SQLiteStorage(data_dir / "sqlite" / "user_data.sqlite3")
+    }
+    for name, storage in backends.items():
+        storage.save('edits', 'manual_subscriptions', [{'id': 'sub_1', 'active': True, 'next_due_date': '2024-01-01'}])
+        subscriptions = storage.load('edits', 'manual_subscriptions')
+        subscriptions[0]['active'] = False
+        subscriptions[0]['next_due_date'] = '2024-02-01'
+        storage.save('edits', 'manual_subscriptions', list(subscriptions))
+        reopened = reopen[name]()
+        assert reopened.load('edits', 'manual_subscriptions') == subscriptions, f"{name}: in-place edit was not saved"
+        if name == 'sqlite':
+            reopened.close()
+    print("In-place edits of loaded records are saved by every backend")
+
+    backends['sqlite'].close()
+    shutil.rmtree(data_dir, ignore_errors=True)
+    assert not torn_reads, f"Readers saw torn files: {torn_reads[:3]}"
+    print("No torn reads; final contents match a saved version for every backend")
+
+
+def main():
+    """Run the ingestion benchmarks from the command line."""
+    parser = argparse.ArgumentParser(description="Benchmark the bank statement pipeline")
+    parser.add_argument('--rows', type=int, default=1_000_000, help="Number of synthetic transactions")
+    parser.add_argument('--threads', type=int, default=16, help="Threads for the concurrent save stress test")
+    parser.add_argument('--saves', type=int, default=50, help="Saves per thread in the concurrent save stress test")
+    args = parser.parse_args()
+
+    benchmark_categorization(args.rows)
+    benchmark_dedup_merge(args.rows)
+    # Ten years of history at twice the statement size, as a long-time user would accumulate
+    benchmark_month_comparison(2 * args.rows)
+    benchmark_memory(args.rows)
+    benchmark_histogram(args.rows)
+    benchmark_timeline(args.rows)
+    benchmark_concurrent_saves(args.threads, args.saves)
+
+
+if __name__ == "__main__":
+    main()
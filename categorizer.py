@@ -0,0 +1,350 @@
+import re
+from collections import OrderedDict, defaultdict
+from functools import lru_cache
+from types import MappingProxyType
+
+import numpy as np
+import pandas as pd
+
+UNCATEGORIZED = 'Uncategorized'
+
+# Categories with at most this many keywords are matched with plain substring checks in
+# categorize(); for lists this short they beat a regex search, whose per-call overhead dominates
+SUBSTRING_SCAN_MAX_KEYWORDS = 6
+
+
+class KeywordCategorizer:
+    def __init__(self, category_keywords, default=UNCATEGORIZED):
+        """Compile a category -> keywords mapping into one pattern per category.
+
+        Categories keep their dict order and the first category owning a
+        keyword contained in the (lowercased) description wins, exactly like
+        the original nested keyword loops. Descriptions matching nothing get
+        the default category.
+        """
+        self.default = default
+        self.categories = [
+            category for category, keywords in category_keywords.items()
+            if category != UNCATEGORIZED and keywords
+        ]
+        self.keywords = {category: list(category_keywords[category]) for category in self.categories}
+        self.output_categories = self.categories + [default]
+        self.fingerprint = keywords_fingerprint(category_keywords)
+
+        # One alternation per category, in priority order. The vectorized column
+        # path passes the patterns to str.contains; single descriptions search the
+        # compiled regexes and stop at the first category that matches.
+        self.category_patterns = [
+            '|'.join(re.escape(keyword) for keyword in self.keywords[category])
+            for category in self.categories
+        ]
+        # (category, keywords, bound search) in priority order; search is None for
+        # small categories, which categorize() scans with substring checks instead
+        self.category_tests = [
+            (category, tuple(self.keywords[category]),
+             re.compile(pattern).search if len(self.keywords[category]) > SUBSTRING_SCAN_MAX_KEYWORDS else None)
+            for category, pattern in zip(self.categories, self.category_patterns)
+        ]
+
+    def categorize(self, description):
+        """Return the highest priority category whose keyword appears in the description."""
+        lowered = str(description).lower()
+        for category, keywords, search in self.category_tests:
+            if search is None:
+                for keyword in keywords:
+                    if keyword in lowered:
+                        return category
+            elif search(lowered):
+                return category
+        return self.default
+
+    def categorize_series(self, descriptions):
+        """Categorize a whole column of descriptions at once, returning a Categorical.
+
+        The column is lowercased once, then each category pattern is tested (in
+        priority order) only against rows that no earlier category claimed.
+        """
+        lowered = pd.Series(descriptions).astype(str).str.lower()
+        codes = np.full(len(lowered), len(self.categories), dtype=np.int16)
+        unresolved = np.ones(len(lowered), dtype=bool)
+
+        for index, pattern in enumerate(self.category_patterns):
+            if not unresolved.any():
+                break
+            positions = np.flatnonzero(unresolved)
+            hits = lowered.iloc[positions].str.contains(pattern, regex=True, na=False).to_numpy(dtype=bool)
+            codes[positions[hits]] = index
+            unresolved[positions[hits]] = False
+
+        return pd.Categorical.from_codes(codes, categories=self.output_categories)
+
+    def categorize_descriptions(self, descriptions, cache=None):
+        """Categorize a column by resolving each distinct description only once.
+
+        Descriptions are factorized, the unique values are looked up in the
+        optional DescriptionCache and only the misses go through
+        categorize_series; the per-unique result is broadcast back through the
+        factorization codes.
+        """
+        codes, uniques = pd.factorize(pd.Series(descriptions), use_na_sentinel=False)
+        unique_codes = np.empty(len(uniques), dtype=np.int16)
+        code_for = {category: index for index, category in enumerate(self.output_categories)}
+
+        missing = np.arange(len(uniques))
+        if cache is not None:
+            cached = cache.get_many(self.fingerprint, uniques)
+            missing = []
+            for position, category in enumerate(cached):
+                if category is None:
+                    missing.append(position)
+                else:
+                    unique_codes[position] = code_for[category]
+            missing = np.asarray(missing, dtype=np.intp)
+
+        if len(missing) > 0:
+            resolved = self.categorize_series(uniques.take(missing))
+            unique_codes[missing] = resolved.codes
+            if cache is not None:
+                cache.put_many(self.fingerprint, uniques.take(missing), resolved.astype(object))
+
+        return pd.Categorical.from_codes(unique_codes[codes], categories=self.output_categories)
+
+
+class DescriptionCache:
+    def __init__(self, maxsize=50000):
+        """Bounded LRU map of description -> category for one keyword map.
+
+        The cache remembers which keyword map its entries were computed with
+        and empties itself when asked about a different one.
+        """
+        self.maxsize = maxsize
+        self.fingerprint = None
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _bind(self, fingerprint):
+        if fingerprint != self.fingerprint:
+            self.entries.clear()
+            self.fingerprint = fingerprint
+
+    def get_many(self, fingerprint, descriptions):
+        """Return the cached category (or None) for each description."""
+        self._bind(fingerprint)
+        results = []
+        for description in descriptions:
+            category = self.entries.get(description)
+            if category is None:
+                self.misses += 1
+            else:
+                self.entries.move_to_end(description)
+                self.hits += 1
+            results.append(category)
+        return results
+
+    def put_many(self, fingerprint, descriptions, categories):
+        """Store categories for descriptions, evicting the least recently used entries."""
+        self._bind(fingerprint)
+        for description, category in zip(descriptions, categories):
+            self.entries[description] = category
+            self.entries.move_to_end(description)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def rebind(self, fingerprint, changes, known=None):
+        """Carry entries over to an edited keyword map instead of dropping them.
+
+        changes maps description -> new category for every description whose
+        category moved; entries not in known (when given) are evicted because
+        nothing vouches for them under the new map.
+        """
+        if known is not None:
+            for description in [d for d in self.entries if d not in known]:
+                del self.entries[description]
+        for description, category in changes.items():
+            if description in self.entries:
+                self.entries[description] = category
+        self.fingerprint = fingerprint
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class CategorizationIndex:
+    def __init__(self, category_keywords):
+        """Track which category and keyword decided each unique description.
+
+        The index edits category_keywords in place, so keyword changes made
+        through add_keyword/remove_keyword only re-evaluate the descriptions
+        they can affect.
+        """
+        self.category_keywords = category_keywords
+        self._reset()
+
+    def _reset(self):
+        self.position = {}
+        self.descriptions = []
+        self.lowered = []
+        self.category = []
+        self.keyword = []
+        self.attributed = defaultdict(set)
+        self.fingerprint = keywords_fingerprint(self.category_keywords)
+
+    def _priorities(self):
+        categories = [c for c in self.category_keywords if c != UNCATEGORIZED]
+        return {category: index for index, category in enumerate(categories)}
+
+    def _deciding_keyword(self, category, lowered):
+        for keyword in self.category_keywords.get(category, []):
+            if keyword in lowered:
+                return keyword
+        return None
+
+    def _assign(self, position, category, keyword):
+        previous = (self.category[position], self.keyword[position])
+        self.attributed[previous].discard(position)
+        self.category[position] = category
+        self.keyword[position] = keyword
+        self.attributed[(category, keyword)].add(position)
+
+    def _rebuild_if_stale(self):
+        # Someone edited the mapping behind our back: re-evaluate everything once.
+        if keywords_fingerprint(self.category_keywords) != self.fingerprint:
+            descriptions = self.descriptions
+            self._reset()
+            self.index(descriptions)
+
+    def index(self, descriptions):
+        """Add descriptions not seen before, categorizing only the new ones."""
+        new = [d for d in dict.fromkeys(descriptions) if d not in self.position]
+        if not new:
+            return
+
+        categories = get_categorizer(self.category_keywords).categorize_series(pd.Series(new, dtype=object))
+        for description, category in zip(new, categories.astype(object)):
+            lowered = str(description).lower()
+            keyword = self._deciding_keyword(category, lowered) if category != UNCATEGORIZED else None
+            position = len(self.descriptions)
+            self.position[description] = position
+            self.descriptions.append(description)
+            self.lowered.append(lowered)
+            self.category.append(category)
+            self.keyword.append(keyword)
+            self.attributed[(category, keyword)].add(position)
+
+    def add_keyword(self, category, keyword):
+        """Add a keyword and return {description: new_category} for descriptions it re-categorizes."""
+        self._rebuild_if_stale()
+        keywords = self.category_keywords.setdefault(category, [])
+        if keyword in keywords:
+            return {}
+        keywords.append(keyword)
+        self.fingerprint = keywords_fingerprint(self.category_keywords)
+        if category == UNCATEGORIZED:
+            return {}
+
+        # Only descriptions containing the new keyword can move, and only towards
+        # a higher priority category than the one they currently have.
+        priorities = self._priorities()
+        changes = {}
+        for position, lowered in enumerate(self.lowered):
+            if keyword not in lowered:
+                continue
+            current = self.category[position]
+            if current == UNCATEGORIZED or priorities[category] < priorities[current]:
+                self._assign(position, category, keyword)
+                changes[self.descriptions[position]] = category
+        return changes
+
+    def remove_keyword(self, category, keyword):
+        """Remove a keyword and return {description: new_category} for descriptions it re-categorizes."""
+        self._rebuild_if_stale()
+        keywords = self.category_keywords.get(category, [])
+        if keyword not in keywords:
+            return {}
+        keywords.remove(keyword)
+        self.fingerprint = keywords_fingerprint(self.category_keywords)
+        if keyword in keywords:
+            return {}
+
+        # Only descriptions this keyword decided can move; re-run the full
+        # first-category-wins rule for just those.
+        categorizer = get_categorizer(self.category_keywords)
+        changes = {}
+        for position in list(self.attributed.get((category, keyword), ())):
+            lowered = self.lowered[position]
+            new_category = categorizer.categorize(lowered)
+            new_keyword = self._deciding_keyword(new_category, lowered) if new_category != UNCATEGORIZED else None
+            self._assign(position, new_category, new_keyword)
+            if new_category != category:
+                changes[self.descriptions[position]] = new_category
+        return changes
+
+    def lookup(self, description):
+        """Return (category, keyword) recorded for a description, or None if not indexed."""
+        position = self.position.get(description)
+        if position is None:
+            return None
+        return self.category[position], self.keyword[position]
+
+
+def keywords_fingerprint(category_keywords):
+    """Build a hashable snapshot of a category -> keywords mapping."""
+    return tuple((category, tuple(keywords)) for category, keywords in category_keywords.items())
+
+
+@lru_cache(maxsize=16)
+def _compile_categorizer(fingerprint):
+    return KeywordCategorizer({category: list(keywords) for category, keywords in fingerprint})
+
+
+def get_categorizer(category_keywords):
+    """Return the compiled categorizer for a keyword map, rebuilding only when it changed."""
+    return _compile_categorizer(keywords_fingerprint(category_keywords))
+
+
+GROCERY_CATEGORY_KEYWORDS = MappingProxyType({
+    'Vegetables': (
+        'lettuce', 'tomato', 'onion', 'carrot', 'celery', 'pepper', 'broccoli',
+        'spinach', 'cucumber', 'potato', 'sweet potato', 'corn', 'peas', 'beans',
+        'cabbage', 'cauliflower', 'zucchini', 'squash', 'eggplant', 'mushroom',
+        'avocado', 'garlic', 'ginger', 'kale', 'arugula', 'radish', 'turnip'
+    ),
+    'Fruits': (
+        'apple', 'banana', 'orange', 'grape', 'strawberry', 'blueberry', 'cherry',
+        'peach', 'pear', 'pineapple', 'mango', 'watermelon', 'cantaloupe', 'kiwi',
+        'lemon', 'lime', 'grapefruit', 'raspberry', 'blackberry', 'plum', 'apricot'
+    ),
+    'Dairy & Milk': (
+        'milk', 'yogurt', 'cheese', 'butter', 'cream', 'sour cream', 'cottage cheese',
+        'greek yogurt', 'almond milk', 'soy milk', 'oat milk', 'coconut milk',
+        'whipped cream', 'half and half', 'heavy cream', 'mozzarella', 'cheddar'
+    ),
+    'Snacks': (
+        'chips', 'crackers', 'cookies', 'candy', 'chocolate', 'nuts', 'popcorn',
+        'pretzels', 'granola bar', 'trail mix', 'gum', 'mints', 'ice cream',
+        'frozen yogurt', 'cake', 'pie', 'donut', 'pastry', 'brownie', 'snack'
+    ),
+    'Meat & Protein': (
+        'chicken', 'beef', 'pork', 'fish', 'salmon', 'tuna', 'turkey', 'ham',
+        'bacon', 'sausage', 'eggs', 'tofu', 'tempeh', 'beans', 'lentils',
+        'ground beef', 'steak', 'ribs', 'lamb', 'shrimp', 'crab', 'lobster'
+    ),
+    'Bread & Grains': (
+        'bread', 'bagel', 'muffin', 'cereal', 'oatmeal', 'rice', 'pasta', 'noodles',
+        'flour', 'quinoa', 'barley', 'wheat', 'rolls', 'tortilla', 'pita',
+        'crackers', 'granola', 'cornmeal', 'couscous'
+    ),
+    'Beverages': (
+        'juice', 'soda', 'water', 'coffee', 'tea', 'beer', 'wine', 'energy drink',
+        'sports drink', 'kombucha', 'coconut water', 'sparkling water', 'lemonade'
+    ),
+    'Household & Other': (
+        'detergent', 'soap', 'shampoo', 'toothpaste', 'toilet paper', 'paper towel',
+        'cleaning', 'dish soap', 'laundry', 'trash bag', 'aluminum foil', 'plastic wrap'
+    )
+})
+
+# Compiled once per process: Streamlit re-executes app.py on every rerun but
+# imported modules stay cached.
+GROCERY_CATEGORIZER = KeywordCategorizer(GROCERY_CATEGORY_KEYWORDS, default='Other')
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+
+# Formats tried when sniffing, in priority order. US month-first comes before
+# day-first so ambiguous samples like 7/1/2025 keep their existing meaning.
+CANDIDATE_DATE_FORMATS = [
+    '%Y-%m-%d',
+    '%m/%d/%Y',
+    '%m/%d/%y',
+    '%d/%m/%Y',
+    '%d/%m/%y',
+    '%Y/%m/%d',
+    '%m-%d-%Y',
+    '%d-%m-%Y',
+    '%d.%m.%Y',
+    '%b %d, %Y',
+    '%d %b %Y',
+    '%Y-%m-%d %H:%M:%S',
+    '%m/%d/%Y %H:%M',
+    'ISO8601',
+]
+
+DEFAULT_SAMPLE_SIZE = 200
+
+# Detected format per bank/profile key, shared by every statement in the process
+_profile_formats = {}
+
+
+def _sample(values, sample_size):
+    """Pick up to sample_size values spread evenly across the input."""
+    if len(values) <= sample_size:
+        return values
+    positions = np.linspace(0, len(values) - 1, sample_size).astype(int)
+    return values[positions]
+
+
+def _parse_ratio(sample, date_format):
+    """Share of the sample that parses with the given format."""
+    parsed = pd.to_datetime(sample, format=date_format, errors='coerce')
+    return parsed.notna().mean()
+
+
+def sniff_date_format(values, sample_size=DEFAULT_SAMPLE_SIZE):
+    """Detect the date format that parses the most of a sample of date strings, or None."""
+    sample = _sample(pd.Index(values).dropna().astype(str).str.strip().unique(), sample_size)
+    if len(sample) == 0:
+        return None
+
+    best_format, best_ratio = None, 0.0
+    for date_format in CANDIDATE_DATE_FORMATS:
+        ratio = _parse_ratio(sample, date_format)
+        if ratio > best_ratio:
+            best_format, best_ratio = date_format, ratio
+            if ratio == 1.0:
+                break
+
+    return best_format
+
+
+def detect_date_format(values, profile=None, sample_size=DEFAULT_SAMPLE_SIZE):
+    """Return the date format for a profile, reusing the cached one while it still fits the data."""
+    cached = _profile_formats.get(profile) if profile is not None else None
+    if cached is not None:
+        sample = _sample(pd.Index(values).dropna().astype(str).str.strip().unique(), sample_size)
+        if len(sample) == 0 or _parse_ratio(sample, cached) == 1.0:
+            return cached
+
+    date_format = sniff_date_format(values, sample_size)
+    if profile is not None and date_format is not None:
+        _profile_formats[profile] = date_format
+    return date_format
+
+
+def forget_date_format(profile):
+    """Drop the cached format for a profile so the next statement is sniffed again."""
+    _profile_formats.pop(profile, None)
+
+
+def parse_dates(values, profile=None, date_format=None):
+    """Parse a date column with an explicit format, resolving each distinct value once.
+
+    Returns (dates, date_format, failed) where failed is a boolean mask of the
+    rows whose date could not be parsed (including missing dates). Values the
+    detected format rejects get one generic parsing attempt before failing.
+    """
+    values = pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values, date_format, values.isna().to_numpy()
+
+    codes, uniques = pd.factorize(values)
+    uniques = pd.Index(uniques).astype(str).str.strip()
+    if date_format is None:
+        date_format = detect_date_format(uniques, profile)
+
+    if date_format is not None:
+        parsed = pd.Series(pd.to_datetime(uniques, format=date_format, errors='coerce'))
+    else:
+        parsed = pd.Series(pd.NaT, index=range(len(uniques)), dtype='datetime64[us]')
+
+    unresolved = parsed.isna().to_numpy()
+    if unresolved.any():
+        parsed[unresolved] = pd.to_datetime(uniques[unresolved], format='mixed', errors='coerce')
+
+    dates = pd.Series(
+        pd.DatetimeIndex(parsed).take(codes, allow_fill=True, fill_value=pd.NaT),
+        index=values.index,
+        name=values.name
+    )
+    return dates, date_format, dates.isna().to_numpy()
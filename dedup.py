@@ -0,0 +1,118 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from money import add_money_columns, cents_of
+
+
+def normalize_descriptions(descriptions):
+    """Lowercase, trim and collapse whitespace so cosmetic export differences don't hide duplicates."""
+    return pd.Series(descriptions).astype(str).str.lower().str.strip().str.replace(r'\s+', ' ', regex=True)
+
+
+def transaction_keys(frame):
+    """Compute a 64-bit key per row from (Date, normalized Description, Amount, occurrence index).
+
+    The occurrence index numbers identical (date, description, amount) rows
+    within one statement, so two genuine same-day purchases stay distinct while
+    the same pair repeated in an overlapping export maps onto the same keys.
+    Keys must be computed per statement, never over an already merged frame.
+    """
+    if len(frame) == 0:
+        return np.empty(0, dtype=np.uint64)
+
+    # Normalize and hash each distinct description once
+    codes, uniques = pd.factorize(frame['Description'])
+    unique_hashes = pd.util.hash_array(normalize_descriptions(uniques).to_numpy(dtype=object))
+    description_hashes = np.append(unique_hashes, np.uint64(0))[codes]
+
+    parts = pd.DataFrame({
+        'date': frame['Date'].to_numpy(dtype='datetime64[D]').astype(np.int64),
+        'description': description_hashes,
+        'cents': cents_of(frame).to_numpy(dtype=np.int64),
+    })
+    parts['occurrence'] = parts.groupby(['date', 'description', 'cents'], sort=False).cumcount().to_numpy()
+
+    return pd.util.hash_pandas_object(parts, index=False).to_numpy()
+
+
+class TransactionHashIndex:
+    def __init__(self, path=None):
+        """Sorted set of transaction keys, optionally persisted as an append-only uint64 file."""
+        self.path = Path(path) if path else None
+        self.hashes = np.empty(0, dtype=np.uint64)
+        if self.path is not None and self.path.exists():
+            self.hashes = np.unique(np.fromfile(self.path, dtype=np.uint64))
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def contains(self, keys):
+        """Boolean mask of which keys are already indexed."""
+        keys = np.asarray(keys, dtype=np.uint64)
+        if len(self.hashes) == 0:
+            return np.zeros(len(keys), dtype=bool)
+        positions = np.searchsorted(self.hashes, keys).clip(max=len(self.hashes) - 1)
+        return self.hashes[positions] == keys
+
+    def add(self, keys):
+        """Index new keys, appending only those to the file; returns how many were new."""
+        keys = np.unique(np.asarray(keys, dtype=np.uint64))
+        new_keys = keys[~self.contains(keys)]
+        if len(new_keys) == 0:
+            return 0
+
+        self.hashes = np.insert(self.hashes, np.searchsorted(self.hashes, new_keys), new_keys)
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'ab') as f:
+                new_keys.tofile(f)
+        return len(new_keys)
+
+    def filter_new(self, frame):
+        """Return the rows of one statement not seen before, and index them."""
+        keys = transaction_keys(frame)
+        is_new = ~self.contains(keys)
+        self.add(keys[is_new])
+        return frame[is_new]
+
+
+def deduplicate_statements(frames):
+    """Drop rows of each statement already present in an earlier one; returns (frames, removed)."""
+    index = TransactionHashIndex()
+    unique_frames = [index.filter_new(frame) for frame in frames]
+    removed = sum(len(frame) for frame in frames) - sum(len(frame) for frame in unique_frames)
+    return unique_frames, removed
+
+
+class TransactionHistory:
+    def __init__(self, directory):
+        """Deduplicated transaction history stored as Arrow part files plus a persisted key index."""
+        self.directory = Path(directory)
+        self.index = TransactionHashIndex(self.directory / "transaction_keys.u64")
+
+    def merge(self, frame):
+        """Append a statement's unseen rows to the history; cost is proportional to the statement only."""
+        keys = transaction_keys(frame)
+        is_new = ~self.index.contains(keys)
+        new_rows = frame[is_new]
+        if len(new_rows) == 0:
+            return 0
+
+        # Write rows before their keys: a crash in between re-imports them next time instead of losing them
+        self.directory.mkdir(parents=True, exist_ok=True)
+        part_number = len(list(self.directory.glob("part-*.arrow")))
+        new_rows.reset_index(drop=True).to_feather(self.directory / f"part-{part_number:05d}.arrow")
+        self.index.add(keys[is_new])
+        return len(new_rows)
+
+    def load(self):
+        """Read the whole history back in date order."""
+        parts = sorted(self.directory.glob("part-*.arrow"))
+        if not parts:
+            return pd.DataFrame()
+        history = pd.concat([pd.read_feather(part) for part in parts], ignore_index=True)
+        # Parts written before amounts were kept in cents get their Cents and Sign columns here
+        add_money_columns(history)
+        return history.sort_values('Date', kind='stable').reset_index(drop=True)
@@ -6,13 +6,40 @@ import numpy as np
 from collections import defaultdict
 import re
 from fpdf import FPDF
+import os
+import io
+import glob
+import time
+import argparse
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+from categorizer import CategorizationIndex, DescriptionCache, get_categorizer
+from date_parsing import parse_dates
+from dedup import TransactionHistory, deduplicate_statements
+from aggregation import AggregationCube
+from rollups import RollupStore
+from money import add_money_columns
+
+# Statements bigger than this are streamed in chunks instead of loaded whole
+STREAMING_THRESHOLD_BYTES = 256 * 1024 * 1024
+DEFAULT_CHUNK_SIZE = 100_000
 
 class BankStatementAnalyzer:
-    def __init__(self, csv_file_path):
-        """Initialize the analyzer with a CSV file path."""
+    def __init__(self, csv_file_path, chunk_size=None, date_profile=None, date_format=None):
+        """Initialize the analyzer with a CSV file path (streamed in chunks when chunk_size is set)."""
         self.csv_file_path = csv_file_path
+        self.chunk_size = chunk_size
+        self.date_profile = date_profile
+        self.date_format = date_format
+        self.date_failures = None
         self.df = None
         self.categorized_df = None
+        self.cube = None
+        self.rollups = None
+        self.description_cache = DescriptionCache()
+        self.categorization_index = None
+        # Compiled from category_keywords on first use; reset when keywords are edited
+        self.keyword_categorizer = None
         
         # Define category keywords mapping as specified by user
         self.category_keywords = {
@@ -28,6 +55,9 @@ class BankStatementAnalyzer:
     
     def load_csv(self):
         """Load and validate the CSV file."""
+        if self.chunk_size:
+            return self.stream_csv()
+        
         try:
             self.df = pd.read_csv(self.csv_file_path)
             
@@ -37,7 +67,8 @@ class BankStatementAnalyzer:
                 raise ValueError(f"CSV must contain columns: {required_columns}")
             
             # Convert Date column to datetime
-            self.df['Date'] = pd.to_datetime(self.df['Date'])
+            self.date_failures = None
+            self.df['Date'] = self.parse_dates(self.df)
             
             # Convert Amount to numeric
             self.df['Amount'] = pd.to_numeric(self.df['Amount'], errors='coerce')
@@ -45,6 +76,9 @@ class BankStatementAnalyzer:
             # Remove rows with invalid data
             self.df = self.df.dropna()
             
+            # Exact integer cents are the canonical amount; Amount is derived from them
+            add_money_columns(self.df)
+            
             print(f"✅ Successfully loaded {len(self.df)} transactions")
             return True
             
@@ -52,18 +86,129 @@ class BankStatementAnalyzer:
             print(f"❌ Error loading CSV: {e}")
             return False
     
-    def categorize_transaction(self, description):
-        """Categorize a transaction based on description keywords."""
-        description_lower = description.lower()
+    def stream_csv(self):
+        """Read the CSV in fixed-size chunks, keeping only running totals in memory."""
+        try:
+            # Validate required columns from the header before reading any rows
+            required_columns = ['Date', 'Description', 'Amount']
+            header = pd.read_csv(self.csv_file_path, nrows=0).columns
+            if not all(col in header for col in required_columns):
+                raise ValueError(f"CSV must contain columns: {required_columns}")
+            
+            self.cube = AggregationCube.empty()
+            self.rollups = RollupStore.empty()
+            categorizer = self.get_keyword_categorizer()
+            reader = pd.read_csv(
+                self.csv_file_path,
+                usecols=required_columns,
+                dtype={'Date': str, 'Description': str, 'Amount': str},
+                chunksize=self.chunk_size
+            )
+            
+            chunks = 0
+            self.date_failures = None
+            for chunk in reader:
+                chunk['Date'] = self.parse_dates(chunk, header=header)
+                chunk['Amount'] = pd.to_numeric(chunk['Amount'], errors='coerce')
+                chunk = chunk.dropna()
+                add_money_columns(chunk)
+                
+                chunk['Category'] = categorizer.categorize_descriptions(chunk['Description'], self.description_cache)
+                chunk['Type'] = np.where(chunk['Sign'] > 0, 'Income', 'Expense')
+                chunk['Month'] = chunk['Date'].dt.to_period('M')
+                
+                self.cube = self.cube.merge(AggregationCube.from_frame(chunk))
+                self.rollups = self.rollups.append(chunk)
+                chunks += 1
+            
+            print(f"✅ Streamed {self.cube.transaction_count} transactions in {chunks} chunks")
+            return True
+            
+        except Exception as e:
+            print(f"❌ Error loading CSV: {e}")
+            return False
+    
+    def parse_dates(self, frame, header=None):
+        """Parse the Date column with the format detected for this bank/profile, reporting failed rows."""
+        profile = self.date_profile or tuple(frame.columns if header is None else header)
+        dates, self.date_format, failed = parse_dates(frame['Date'], profile, self.date_format)
+        
+        if failed.any():
+            failures = frame.loc[failed, ['Date', 'Description', 'Amount']]
+            self.date_failures = failures if self.date_failures is None else pd.concat([self.date_failures, failures])
+            print(f"⚠️  {int(failed.sum())} rows have dates that could not be parsed (format: {self.date_format}) and will be skipped:")
+            for row, record in failures.head(10).iterrows():
+                # +2 accounts for the header line and 1-based line numbers
+                print(f"   line {row + 2}: {record['Date']!r} | {record['Description']} | {record['Amount']}")
+            if len(failures) > 10:
+                print(f"   ... and {len(failures) - 10} more")
+        
+        return dates
+    
+    def load_batch(self, csv_paths, workers=None, history_dir=None):
+        """Parse and categorize many statements in parallel and merge them in date order without overlaps."""
+        if not csv_paths:
+            print("❌ No CSV files found for batch analysis")
+            return False
         
-        for category, keywords in self.category_keywords.items():
-            if category == 'Uncategorized':
-                continue
-            for keyword in keywords:
-                if keyword in description_lower:
-                    return category
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers < 1:
+            print(f"❌ Need at least 1 worker, got {workers}")
+            return False
+        workers = min(workers, len(csv_paths))
+        start = time.perf_counter()
+        
+        if workers == 1:
+            results = [process_statement_file(path, self.category_keywords) for path in csv_paths]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(process_statement_file, csv_paths, [self.category_keywords] * len(csv_paths)))
+        
+        frames = []
+        for path, frame, error in results:
+            if frame is None:
+                print(f"❌ {path}: {error}")
+            else:
+                print(f"✅ {path}: {len(frame)} transactions")
+                frames.append(frame)
         
-        return 'Uncategorized'
+        if not frames:
+            print("❌ None of the statements could be loaded")
+            return False
+        
+        # Consecutive exports overlap; keep each transaction once
+        loaded_rows = sum(len(frame) for frame in frames)
+        if history_dir:
+            history = TransactionHistory(history_dir)
+            added = sum(history.merge(frame) for frame in frames)
+            self.df = history.load()
+            print(f"🗂️  Added {added:,} new transactions to history ({loaded_rows - added:,} already known, {len(self.df):,} total)")
+        else:
+            frames, removed = deduplicate_statements(frames)
+            self.df = pd.concat(frames, ignore_index=True).sort_values('Date', kind='stable').reset_index(drop=True)
+            if removed:
+                print(f"🧹 Removed {removed:,} duplicate transactions from overlapping statements")
+        self.categorized_df = self.df.copy()
+        self.cube = None
+        self.rollups = None
+        
+        elapsed = time.perf_counter() - start
+        total_bytes = sum(os.path.getsize(path) for path in csv_paths)
+        print(f"\n⚡ Batch loaded {len(frames)}/{len(csv_paths)} files, {loaded_rows:,} transactions "
+              f"in {elapsed:.2f}s with {workers} workers "
+              f"({loaded_rows / elapsed:,.0f} rows/s, {total_bytes / elapsed / 1_000_000:,.1f} MB/s)")
+        return True
+    
+    def get_keyword_categorizer(self):
+        """The compiled categorizer for the current keywords, rebuilt only after they are edited."""
+        if self.keyword_categorizer is None:
+            self.keyword_categorizer = get_categorizer(self.category_keywords)
+        return self.keyword_categorizer
+    
+    def categorize_transaction(self, description):
+        """Categorize a transaction based on description keywords."""
+        return self.get_keyword_categorizer().categorize(description)
     
     def categorize_transactions(self):
         """Apply categorization to all transactions."""
@@ -71,27 +216,81 @@ class BankStatementAnalyzer:
             print("❌ Please load CSV data first")
             return False
         
-        self.df['Category'] = self.df['Description'].apply(self.categorize_transaction)
+        categorizer = self.get_keyword_categorizer()
+        self.df['Category'] = categorizer.categorize_descriptions(
+            self.df['Description'], self.description_cache
+        ).astype(object)
         
         # Separate income and expenses
-        self.df['Type'] = self.df['Amount'].apply(lambda x: 'Income' if x > 0 else 'Expense')
+        self.df['Type'] = np.where(self.df['Sign'] > 0, 'Income', 'Expense')
         self.df['Month'] = self.df['Date'].dt.to_period('M')
         
         self.categorized_df = self.df.copy()
+        self.cube = None
+        self.rollups = None
         print("✅ Transactions categorized successfully")
         return True
     
+    def get_categorization_index(self):
+        """Get the categorization index, indexing any descriptions it has not seen yet."""
+        if self.categorization_index is None or self.categorization_index.category_keywords is not self.category_keywords:
+            self.categorization_index = CategorizationIndex(self.category_keywords)
+        if self.categorized_df is not None:
+            self.categorization_index.index(self.categorized_df['Description'].unique())
+        return self.categorization_index
+    
+    def add_category_keyword(self, category, keyword):
+        """Add a keyword to a category and recategorize only the affected transactions."""
+        changes = self.get_categorization_index().add_keyword(category, keyword.lower())
+        self.apply_category_changes(changes)
+        return changes
+    
+    def remove_category_keyword(self, category, keyword):
+        """Remove a keyword from a category and recategorize only the affected transactions."""
+        changes = self.get_categorization_index().remove_keyword(category, keyword.lower())
+        self.apply_category_changes(changes)
+        return changes
+    
+    def apply_category_changes(self, changes):
+        """Push description -> category changes from the index into the cache and loaded data."""
+        index = self.categorization_index
+        self.keyword_categorizer = None
+        self.description_cache.rebind(index.fingerprint, changes, known=index.position)
+        if not changes:
+            return
+        
+        updated = 0
+        for frame in (self.df, self.categorized_df):
+            if frame is not None and 'Category' in frame.columns:
+                mask = frame['Description'].isin(list(changes))
+                frame.loc[mask, 'Category'] = frame.loc[mask, 'Description'].map(changes)
+                updated = int(mask.sum())
+        self.cube = None
+        self.rollups = None
+        
+        print(f"🔁 Recategorized {updated} transactions across {len(changes)} descriptions")
+    
+    def get_cube(self):
+        """Get the Month x Category x Type aggregation cube, building it from the transactions once."""
+        if self.cube is None and self.categorized_df is not None:
+            self.cube = AggregationCube.from_frame(self.categorized_df)
+        return self.cube
+    
+    def get_rollups(self):
+        """Get the daily/weekly/monthly/yearly rollups, building them from the transactions once."""
+        if self.rollups is None and self.categorized_df is not None:
+            self.rollups = RollupStore.from_frame(self.categorized_df)
+        return self.rollups
+    
     def calculate_category_totals(self):
         """Calculate total spending per category."""
-        if self.categorized_df is None:
+        cube = self.get_cube()
+        if cube is None:
             print("❌ Please categorize transactions first")
             return None
         
-        # Filter only expenses (negative amounts)
-        expenses = self.categorized_df[self.categorized_df['Amount'] < 0].copy()
-        expenses['Amount'] = expenses['Amount'].abs()  # Convert to positive for easier reading
-        
-        category_totals = expenses.groupby('Category')['Amount'].sum().sort_values(ascending=False)
+        # Expenses as positive amounts for easier reading
+        category_totals = cube.category_expenses().sort_values(ascending=False)
         
         print("\n📊 SPENDING BY CATEGORY:")
         print("-" * 30)
@@ -102,11 +301,12 @@ class BankStatementAnalyzer:
     
     def monthly_income_vs_expenses(self):
         """Calculate monthly income vs expenses."""
-        if self.categorized_df is None:
+        cube = self.get_cube()
+        if cube is None:
             print("❌ Please categorize transactions first")
             return None
         
-        monthly_summary = self.categorized_df.groupby(['Month', 'Type'])['Amount'].sum().unstack(fill_value=0)
+        monthly_summary = cube.monthly_by_type()
         
         # Ensure we have both Income and Expense columns
         if 'Income' not in monthly_summary.columns:
@@ -149,13 +349,13 @@ class BankStatementAnalyzer:
     
     def visualize_daily_spending_trend(self):
         """Create line chart for daily spending trend."""
-        if self.categorized_df is None:
+        rollups = self.get_rollups()
+        if rollups is None:
             return
         
-        # Filter expenses and group by date
-        expenses = self.categorized_df[self.categorized_df['Amount'] < 0].copy()
-        expenses['Amount'] = expenses['Amount'].abs()
-        daily_spending = expenses.groupby('Date')['Amount'].sum()
+        daily = rollups.totals('day')
+        daily_spending = daily.loc[daily['expense_count'] > 0, 'expenses']
+        daily_spending.index = daily_spending.index.to_timestamp()
         
         plt.figure(figsize=(14, 6))
         plt.plot(daily_spending.index, daily_spending.values, marker='o', linewidth=2, markersize=4)
@@ -177,18 +377,13 @@ class BankStatementAnalyzer:
     
     def visualize_monthly_financial_trends(self):
         """Create line plot of monthly financial trends showing income, expenses, and savings."""
-        if self.categorized_df is None:
+        cube = self.get_cube()
+        if cube is None:
             print("❌ Please categorize transactions first")
             return
         
-        # Group by month and calculate totals
-        monthly_data = self.categorized_df.groupby('Month').agg({
-            'Amount': lambda x: [x[x > 0].sum(), abs(x[x < 0].sum())]
-        }).reset_index()
-        
-        # Extract income and expenses from the aggregated data
-        monthly_data['Income'] = monthly_data['Amount'].apply(lambda x: x[0])
-        monthly_data['Expenses'] = monthly_data['Amount'].apply(lambda x: x[1])
+        # Monthly income and expense totals
+        monthly_data = cube.month_totals().reset_index()
         monthly_data['Savings'] = monthly_data['Income'] - monthly_data['Expenses']
         
         # Convert Month period to string for better x-axis labels
@@ -274,17 +469,14 @@ class BankStatementAnalyzer:
     
     def create_category_pie_chart(self):
         """Create and save a pie chart showing spending by category."""
-        if self.categorized_df is None:
+        cube = self.get_cube()
+        if cube is None:
             print("❌ Please categorize transactions first")
             return False
         
         try:
-            # Filter only expenses (negative amounts)
-            expenses_df = self.categorized_df[self.categorized_df['Amount'] < 0].copy()
-            expenses_df['Amount'] = expenses_df['Amount'].abs()
-            
-            # Group by category and calculate totals
-            category_spending = expenses_df.groupby('Category')['Amount'].sum().sort_values(ascending=False)
+            # Spending per category
+            category_spending = cube.category_expenses().sort_values(ascending=False)
             
             # Create the pie chart
             plt.figure(figsize=(10, 8))
@@ -340,7 +532,8 @@ class BankStatementAnalyzer:
     
     def generate_financial_insights(self):
         """Generate detailed financial insights and recommendations."""
-        if self.categorized_df is None:
+        cube = self.get_cube()
+        if cube is None:
             print("❌ Please categorize transactions first")
             return
         
@@ -349,15 +542,13 @@ class BankStatementAnalyzer:
         print("="*70)
         
         # Calculate basic metrics
-        total_income = self.categorized_df[self.categorized_df['Amount'] > 0]['Amount'].sum()
-        total_expenses = abs(self.categorized_df[self.categorized_df['Amount'] < 0]['Amount'].sum())
+        total_income = cube.total_income()
+        total_expenses = cube.total_expenses()
         total_savings = total_income - total_expenses
         savings_rate = (total_savings / total_income * 100) if total_income > 0 else 0
         
         # 1. Top 3 spending categories
-        expenses_df = self.categorized_df[self.categorized_df['Amount'] < 0].copy()
-        expenses_df['Amount'] = expenses_df['Amount'].abs()
-        category_spending = expenses_df.groupby('Category')['Amount'].sum().sort_values(ascending=False)
+        category_spending = cube.category_expenses().sort_values(ascending=False)
         
         print("\n💸 TOP 3 SPENDING CATEGORIES:")
         print("-" * 50)
@@ -384,23 +575,21 @@ class BankStatementAnalyzer:
             print("🚨 ALERT: You're spending more than you earn!")
         
         # 3. Monthly comparison (if multiple months exist)
-        monthly_summary = self.categorized_df.groupby('Month').agg({
-            'Amount': lambda x: [x[x > 0].sum(), abs(x[x < 0].sum())]
-        })
+        monthly_summary = cube.month_over_month()
         
         if len(monthly_summary) > 1:
             print(f"\n📈 MONTH-OVER-MONTH ANALYSIS:")
             print("-" * 40)
             
-            months = sorted(monthly_summary.index)
-            current_month = months[-1]
-            previous_month = months[-2]
+            latest = monthly_summary.iloc[-1]
+            current_month = monthly_summary.index[-1]
+            previous_month = monthly_summary.index[-2]
             
-            current_expenses = monthly_summary.loc[current_month, 'Amount'][1]
-            previous_expenses = monthly_summary.loc[previous_month, 'Amount'][1]
+            current_expenses = latest['Expenses']
+            previous_expenses = latest['Expenses_Previous']
             
-            expense_change = current_expenses - previous_expenses
-            expense_change_pct = (expense_change / previous_expenses * 100) if previous_expenses > 0 else 0
+            expense_change = latest['Expenses_Change']
+            expense_change_pct = latest['Expenses_Change_Pct'] if previous_expenses > 0 else 0
             
             print(f"Previous Month ({previous_month}): ${previous_expenses:,.2f}")
             print(f"Current Month ({current_month}):  ${current_expenses:,.2f}")
@@ -474,7 +663,7 @@ class BankStatementAnalyzer:
             factors.append("🚨 High spending concentration (+10)")
         
         # Emergency fund estimate (30 points max)
-        monthly_expenses = total_expenses / len(self.categorized_df['Month'].unique())
+        monthly_expenses = total_expenses / len(cube.months)
         emergency_fund_months = total_savings / monthly_expenses if monthly_expenses > 0 and total_savings > 0 else 0
         
         if emergency_fund_months >= 6:
@@ -525,12 +714,13 @@ class BankStatementAnalyzer:
     
     def analyze_monthly_comparison(self):
         """Analyze month-over-month changes in income, expenses, savings, and category spending."""
-        if self.categorized_df is None:
+        cube = self.get_cube()
+        if cube is None:
             print("❌ Please categorize transactions first")
             return
         
         # Get unique months and check if we have at least 2 months
-        months = sorted(self.categorized_df['Month'].unique())
+        months = cube.months
         
         if len(months) < 2:
             print("\n📅 MONTHLY COMPARISON:")
@@ -547,26 +737,15 @@ class BankStatementAnalyzer:
         print("📈 MONTH-OVER-MONTH COMPARISON ANALYSIS")
         print("="*70)
         
-        # Calculate metrics for both months
-        def calculate_month_metrics(month):
-            month_data = self.categorized_df[self.categorized_df['Month'] == month]
-            income = month_data[month_data['Amount'] > 0]['Amount'].sum()
-            expenses = abs(month_data[month_data['Amount'] < 0]['Amount'].sum())
-            savings = income - expenses
-            return income, expenses, savings, month_data
-        
-        prev_income, prev_expenses, prev_savings, prev_data = calculate_month_metrics(previous_month)
-        curr_income, curr_expenses, curr_savings, curr_data = calculate_month_metrics(current_month)
+        # Metrics and percentage changes for the latest month pair
+        latest = cube.month_over_month().iloc[-1]
         
-        # Calculate percentage changes
-        def calculate_change_pct(current, previous):
-            if previous == 0:
-                return float('inf') if current > 0 else 0
-            return ((current - previous) / previous) * 100
+        prev_income, prev_expenses, prev_savings = latest['Income_Previous'], latest['Expenses_Previous'], latest['Net_Previous']
+        curr_income, curr_expenses, curr_savings = latest['Income'], latest['Expenses'], latest['Net']
         
-        income_change = calculate_change_pct(curr_income, prev_income)
-        expenses_change = calculate_change_pct(curr_expenses, prev_expenses)
-        savings_change = calculate_change_pct(curr_savings, prev_savings)
+        income_change = latest['Income_Change_Pct']
+        expenses_change = latest['Expenses_Change_Pct']
+        savings_change = latest['Net_Change_Pct']
         
         # Print comparison summary
         print(f"\n💰 FINANCIAL METRICS COMPARISON:")
@@ -614,13 +793,8 @@ class BankStatementAnalyzer:
         print("-" * 50)
         
         # Get category spending for both months (expenses only)
-        def get_category_spending(month_data):
-            expenses_data = month_data[month_data['Amount'] < 0].copy()
-            expenses_data['Amount'] = expenses_data['Amount'].abs()
-            return expenses_data.groupby('Category')['Amount'].sum()
-        
-        prev_categories = get_category_spending(prev_data)
-        curr_categories = get_category_spending(curr_data)
+        prev_categories = cube.category_expenses(previous_month)
+        curr_categories = cube.category_expenses(current_month)
         
         # Get all categories from both months
         all_categories = set(prev_categories.index) | set(curr_categories.index)
@@ -725,21 +899,75 @@ class BankStatementAnalyzer:
         print("="*70)
         return category_changes
     
+    def compare_months(self, previous_month, current_month):
+        """Compare category spending between any two months (e.g. '2024-01' and '2025-01')."""
+        cube = self.get_cube()
+        if cube is None:
+            print("❌ Please categorize transactions first")
+            return None
+        
+        try:
+            comparison = cube.monthly_comparison().compare(previous_month, current_month)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return None
+        
+        print(f"\n🔀 CATEGORY SPENDING: {previous_month} vs {current_month}")
+        print("-" * 70)
+        for category, row in comparison.sort_values('Change', key=abs, ascending=False).iterrows():
+            if row['Previous'] == 0 and row['Current'] == 0:
+                continue
+            change_desc = "NEW" if row['Previous'] == 0 else f"{row['Change_Pct']:+.1f}%"
+            print(f"{category:25} ${row['Previous']:>10,.2f} → ${row['Current']:>10,.2f}  ({change_desc})")
+        
+        return comparison
+    
+    def analyze_multi_month_comparison(self, window=3, last_months=6):
+        """Show recent months against their trailing average spending, overall and per category."""
+        cube = self.get_cube()
+        if cube is None:
+            print("❌ Please categorize transactions first")
+            return None
+        
+        comparison = cube.monthly_comparison()
+        months = comparison.months
+        if len(months) <= window:
+            return None
+        
+        print("\n" + "="*70)
+        print(f"📆 SPENDING VS TRAILING {window}-MONTH AVERAGE")
+        print("="*70)
+        
+        # Only months with a full trailing window have a baseline
+        for month in months[window:][-last_months:]:
+            total = comparison.against_baseline(month, window).loc['Total']
+            arrow = "📈" if total['Difference'] > 0 else "📉" if total['Difference'] < 0 else "➡️"
+            print(f"{month} | Spent: ${total['Current']:>10,.2f} | Avg: ${total['Baseline']:>10,.2f} | {arrow} {total['Difference_Pct']:+6.1f}%")
+        
+        latest = comparison.against_baseline(months[-1], window).drop('Total')
+        outliers = latest[latest['Difference'] > 0].sort_values('Difference', ascending=False).head(5)
+        if len(outliers) > 0:
+            print(f"\n🔎 Categories above their {window}-month average in {months[-1]}:")
+            for category, row in outliers.iterrows():
+                print(f"   {category:25} ${row['Current']:>10,.2f} vs ${row['Baseline']:>10,.2f} avg (+${row['Difference']:,.2f})")
+        
+        print("="*70)
+        return comparison
+    
     def generate_summary(self):
         """Generate comprehensive financial summary."""
-        if self.categorized_df is None:
+        cube = self.get_cube()
+        if cube is None:
             print("❌ Please categorize transactions first")
             return
         
         # Calculate key metrics
-        total_income = self.categorized_df[self.categorized_df['Amount'] > 0]['Amount'].sum()
-        total_expenses = abs(self.categorized_df[self.categorized_df['Amount'] < 0]['Amount'].sum())
+        total_income = cube.total_income()
+        total_expenses = cube.total_expenses()
         total_savings = total_income - total_expenses
         
         # Find most expensive category
-        expenses = self.categorized_df[self.categorized_df['Amount'] < 0].copy()
-        expenses['Amount'] = expenses['Amount'].abs()
-        category_totals = expenses.groupby('Category')['Amount'].sum()
+        category_totals = cube.category_expenses()
         most_expensive_category = category_totals.idxmax()
         most_expensive_amount = category_totals.max()
         
@@ -749,8 +977,8 @@ class BankStatementAnalyzer:
         print("\n" + "="*60)
         print("💰 FINANCIAL SUMMARY REPORT")
         print("="*60)
-        print(f"📅 Analysis Period: {self.categorized_df['Date'].min().strftime('%Y-%m-%d')} to {self.categorized_df['Date'].max().strftime('%Y-%m-%d')}")
-        print(f"📊 Total Transactions: {len(self.categorized_df)}")
+        print(f"📅 Analysis Period: {cube.first_date.strftime('%Y-%m-%d')} to {cube.last_date.strftime('%Y-%m-%d')}")
+        print(f"📊 Total Transactions: {cube.transaction_count}")
         print(f"💵 Total Income: ${total_income:,.2f}")
         print(f"💸 Total Expenses: ${total_expenses:,.2f}")
         print(f"🏦 Net Savings: ${total_savings:,.2f}")
@@ -758,7 +986,7 @@ class BankStatementAnalyzer:
         print(f"🔥 Most Expensive Category: {most_expensive_category} (${most_expensive_amount:,.2f})")
         
         # Additional insights
-        avg_daily_spending = total_expenses / len(self.categorized_df['Date'].unique())
+        avg_daily_spending = total_expenses / cube.day_count
         print(f"📊 Average Daily Spending: ${avg_daily_spending:.2f}")
         
         if total_savings > 0:
@@ -783,8 +1011,9 @@ class BankStatementAnalyzer:
             pdf.ln(10)
             
             # Date range
-            date_min = self.categorized_df['Date'].min().strftime('%Y-%m-%d')
-            date_max = self.categorized_df['Date'].max().strftime('%Y-%m-%d')
+            cube = self.get_cube()
+            date_min = cube.first_date.strftime('%Y-%m-%d')
+            date_max = cube.last_date.strftime('%Y-%m-%d')
             pdf.set_font('Arial', '', 12)
             pdf.set_text_color(100, 100, 100)
             pdf.cell(0, 8, f'Analysis Period: {date_min} to {date_max}', 0, 1, 'C')
@@ -964,13 +1193,19 @@ class BankStatementAnalyzer:
         print("🚀 Starting Bank Statement Analysis...")
         print("-" * 50)
         
-        # Step 1: Load CSV
-        if not self.load_csv():
+        if self.chunk_size:
+            self.run_streaming_analysis()
             return
         
-        # Step 2: Categorize transactions
-        if not self.categorize_transactions():
-            return
+        # Steps 1-2: Load and categorize (batch mode hands over data that is already both)
+        if self.categorized_df is None:
+            # Step 1: Load CSV
+            if not self.load_csv():
+                return
+            
+            # Step 2: Categorize transactions
+            if not self.categorize_transactions():
+                return
         
         # Step 3: Calculate category totals
         category_totals = self.calculate_category_totals()
@@ -990,6 +1225,7 @@ class BankStatementAnalyzer:
         
         # Step 7: Monthly Comparison Analysis
         self.analyze_monthly_comparison()
+        self.analyze_multi_month_comparison()
         
         # Step 8: Create Pie Chart
         print("\n📊 Creating pie chart visualization...")
@@ -997,20 +1233,69 @@ class BankStatementAnalyzer:
         
         # Step 9: Generate PDF Report
         print("\n📄 Generating PDF report...")
-        total_income = self.categorized_df[self.categorized_df['Amount'] > 0]['Amount'].sum()
-        total_expenses = abs(self.categorized_df[self.categorized_df['Amount'] < 0]['Amount'].sum())
+        cube = self.get_cube()
+        total_income = cube.total_income()
+        total_expenses = cube.total_expenses()
         total_savings = total_income - total_expenses
         savings_rate = (total_savings / total_income * 100) if total_income > 0 else 0
         
         # Get top spending categories for PDF
-        expenses_df = self.categorized_df[self.categorized_df['Amount'] < 0].copy()
-        expenses_df['Amount'] = expenses_df['Amount'].abs()
-        top_categories = expenses_df.groupby('Category')['Amount'].sum().sort_values(ascending=False)
+        top_categories = cube.category_expenses().sort_values(ascending=False)
         
         self.generate_pdf_report(total_income, total_expenses, total_savings, savings_rate, top_categories)
         
         # Step 10: Summary
         self.generate_summary()
+    
+    def run_streaming_analysis(self):
+        """Run the analyses that can be served from running totals, for statements too large for memory."""
+        # Step 1: Stream, parse and categorize the CSV chunk by chunk
+        if not self.stream_csv():
+            return
+        
+        # Step 2: Category totals and monthly analysis from the running aggregates
+        category_totals = self.calculate_category_totals()
+        self.monthly_income_vs_expenses()
+        
+        # Step 3: Visualizations
+        print("\n📊 Generating visualizations...")
+        if category_totals is not None and len(category_totals) > 0:
+            self.visualize_category_spending(category_totals)
+        
+        print("\nℹ️  Streaming mode: per-transaction reports (insights, comparisons, PDF) need the full statement in memory and were skipped.")
+
+def process_statement_file(csv_path, category_keywords):
+    """Load and categorize one statement in a worker process, returning (path, frame, error)."""
+    analyzer = BankStatementAnalyzer(csv_path)
+    analyzer.category_keywords = category_keywords
+    
+    # Keep per-file progress output out of the shared console; the parent reports results
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        loaded = analyzer.load_csv() and analyzer.categorize_transactions()
+    
+    if not loaded:
+        return csv_path, None, output.getvalue().strip()
+    
+    frame = analyzer.categorized_df
+    frame['Source'] = os.path.basename(csv_path)
+    return csv_path, frame, None
+
+def find_statement_files(pattern):
+    """Expand a directory or glob pattern into a sorted list of CSV files."""
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, '*.csv')
+    return sorted(path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+
+def positive_int(value):
+    """argparse type for counts that must be at least 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{value!r} is not a whole number")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
 
 def create_sample_data():
     """Create a sample CSV file for testing with multiple months."""
@@ -1053,9 +1338,24 @@ def create_sample_data():
 
 def main():
     """Main function to run the analysis."""
+    parser = argparse.ArgumentParser(description="Bank Statement Analyzer")
+    parser.add_argument('--batch', metavar='GLOB_OR_DIR', help="Analyze every CSV matched by a glob pattern or in a directory")
+    parser.add_argument('--workers', type=positive_int, default=None, help="Worker processes for batch mode (default: CPU count)")
+    parser.add_argument('--history', metavar='DIR', help="Merge batch statements into a deduplicated history kept in DIR")
+    args = parser.parse_args()
+    
     print("🏦 Bank Statement Analyzer")
     print("=" * 40)
     
+    if args.batch:
+        csv_files = find_statement_files(args.batch)
+        print(f"📂 Batch mode: {len(csv_files)} statements matched {args.batch}")
+        
+        analyzer = BankStatementAnalyzer(args.batch)
+        if analyzer.load_batch(csv_files, workers=args.workers, history_dir=args.history):
+            analyzer.run_complete_analysis()
+        return
+    
     # Ask user for CSV file path
     csv_file = input("Enter CSV file path (or press Enter to create sample data): ").strip()
     
@@ -1063,8 +1363,14 @@ def main():
         create_sample_data()
         csv_file = 'sample_bank_statement.csv'
     
+    # Stream statements too large to comfortably load at once
+    chunk_size = None
+    if os.path.exists(csv_file) and os.path.getsize(csv_file) > STREAMING_THRESHOLD_BYTES:
+        chunk_size = DEFAULT_CHUNK_SIZE
+        print(f"📦 Large statement detected, streaming in chunks of {chunk_size:,} rows")
+    
     # Create analyzer and run analysis
-    analyzer = BankStatementAnalyzer(csv_file)
+    analyzer = BankStatementAnalyzer(csv_file, chunk_size=chunk_size)
     analyzer.run_complete_analysis()
 
 if __name__ == "__main__":
@@ -0,0 +1,87 @@
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+_MISSING = object()
+
+
+class LRUCache:
+    def __init__(self, maxsize=16):
+        """Bounded mapping that evicts the least recently used entry and counts hits and misses."""
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key, default=None):
+        """Return the cached value for key (marking it recently used), or default."""
+        with self._lock:
+            value = self.entries.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Store a value, evicting the oldest entries beyond maxsize."""
+        with self._lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for key, computing and storing it on a miss."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def pop(self, key, default=None):
+        """Remove a key, returning its value or default."""
+        with self._lock:
+            return self.entries.pop(key, default)
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+
+    def stats(self):
+        """Counters for diagnostics displays."""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self.entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': (self.hits / lookups * 100) if lookups else 0.0
+        }
+
+
+def frame_fingerprint(df):
+    """Content hash of a DataFrame for use in cache keys."""
+    if df is None:
+        return None
+    row_hashes = pd.util.hash_pandas_object(df, index=True).to_numpy()
+    return (len(df), tuple(df.columns), int(row_hashes.sum()), int((row_hashes * row_hashes).sum()))
+
+
+# Figures shared by every session, keyed by user, data and filters. Kept here
+# rather than in app.py because Streamlit re-executes app.py on every rerun
+# while imported modules stay loaded.
+FIGURE_CACHE_SIZE = 64
+figure_cache = LRUCache(maxsize=FIGURE_CACHE_SIZE)
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+CENTS_PER_DOLLAR = 100
+
+
+def to_cents(values):
+    """Parse amounts into nullable int64 cents, NA where a value is not a finite number."""
+    dollars = pd.to_numeric(pd.Series(values), errors='coerce')
+    dollars = dollars.where(np.isfinite(dollars))
+    return (dollars * CENTS_PER_DOLLAR).round().astype('Int64')
+
+
+def to_dollars(cents):
+    """Convert cents (scalar, array or Series) to float dollars for display and plotting."""
+    return cents / CENTS_PER_DOLLAR
+
+
+def sign_flags(cents):
+    """int8 sign per amount: 1 income, -1 expense, 0 zero."""
+    return np.sign(np.asarray(cents, dtype=np.int64)).astype(np.int8)
+
+
+def add_money_columns(frame):
+    """Set the canonical Cents column and Sign flags on a frame without missing amounts.
+
+    Amount is re-derived from the cents so the dollar column always agrees
+    with the exact value.
+    """
+    cents = to_cents(frame['Amount']).to_numpy(dtype=np.int64)
+    frame['Cents'] = cents
+    frame['Sign'] = sign_flags(cents)
+    frame['Amount'] = to_dollars(cents)
+    return frame
+
+
+def cents_of(frame):
+    """The frame's Cents column, derived from Amount for frames built without one."""
+    if 'Cents' in frame.columns:
+        return frame['Cents']
+    return to_cents(frame['Amount']).astype(np.int64).rename('Cents')
+
+
+def signs_of(frame):
+    """The frame's Sign flags, derived from its cents for frames stored without them."""
+    if 'Sign' in frame.columns:
+        return frame['Sign']
+    return pd.Series(sign_flags(cents_of(frame)), index=frame.index, name='Sign')
+
+
+def expenses_of(frame):
+    """Expense rows with Cents made positive and Amount re-derived from them, for spending totals and charts."""
+    expenses = frame[(signs_of(frame) < 0).to_numpy()].drop(columns='Sign', errors='ignore')
+    expenses['Cents'] = -cents_of(expenses).to_numpy(dtype=np.int64)
+    expenses['Amount'] = to_dollars(expenses['Cents'])
+    return expenses
+
+
+def cents_summary(grouped_cents):
+    """Dollar total, mean and count per group of a grouped Cents column, totalled exactly in cents."""
+    stats = grouped_cents.agg(['sum', 'count'])
+    return pd.DataFrame({
+        'sum': to_dollars(stats['sum']),
+        'mean': to_dollars(stats['sum'] / stats['count']),
+        'count': stats['count']
+    })
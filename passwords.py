@@ -0,0 +1,127 @@
+import secrets
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+import numpy as np
+
+from memo import LRUCache
+
+# bcrypt work factor for new hashes (2**rounds iterations); settings.json 'bcrypt_rounds' overrides it
+DEFAULT_BCRYPT_ROUNDS = 12
+
+# bcrypt calls allowed to run at once; logins beyond this queue instead of all competing for the CPU
+PASSWORD_HASH_WORKERS = 4
+
+# Most recent operations per kind kept for the latency percentiles
+LATENCY_WINDOW = 500
+
+# (username, session token) pairs remembered as verified
+VERIFIED_SESSIONS_SIZE = 4096
+
+
+def _as_bytes(password_hash):
+    return password_hash.encode('utf-8') if isinstance(password_hash, str) else password_hash
+
+
+class LatencyStats:
+    def __init__(self, window=LATENCY_WINDOW):
+        """Rolling latencies per operation kind, for diagnostics."""
+        self.window = window
+        self.samples = {}
+        self.counts = {}
+        self._lock = threading.Lock()
+
+    def record(self, kind, seconds):
+        with self._lock:
+            self.samples.setdefault(kind, deque(maxlen=self.window)).append(seconds)
+            self.counts[kind] = self.counts.get(kind, 0) + 1
+
+    def stats(self):
+        """Count plus mean, p50, p95 and max latency in milliseconds per kind."""
+        with self._lock:
+            samples = {kind: np.array(values) * 1000 for kind, values in self.samples.items()}
+            counts = dict(self.counts)
+        return {
+            kind: {
+                'count': counts[kind],
+                'mean_ms': float(values.mean()),
+                'p50_ms': float(np.percentile(values, 50)),
+                'p95_ms': float(np.percentile(values, 95)),
+                'max_ms': float(values.max())
+            }
+            for kind, values in samples.items()
+        }
+
+
+class PasswordHasher:
+    def __init__(self, workers=PASSWORD_HASH_WORKERS):
+        """Run bcrypt on a bounded thread pool (bcrypt releases the GIL while hashing).
+
+        Latencies are measured from submission, so they include time spent
+        queued behind other logins.
+        """
+        self.workers = workers
+        self.latency = LatencyStats()
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+            return self._executor
+
+    def _submit(self, kind, func, *args):
+        start = time.perf_counter()
+        future = self._pool().submit(func, *args)
+        future.add_done_callback(lambda _: self.latency.record(kind, time.perf_counter() - start))
+        return future
+
+    def hash_many(self, passwords, rounds=DEFAULT_BCRYPT_ROUNDS):
+        """bcrypt hashes (bytes) for several passwords, computed in parallel."""
+        futures = [self._submit('hash', bcrypt.hashpw, password.encode('utf-8'), bcrypt.gensalt(rounds))
+                   for password in passwords]
+        return [future.result() for future in futures]
+
+    def hash(self, password, rounds=DEFAULT_BCRYPT_ROUNDS):
+        return self.hash_many([password], rounds)[0]
+
+    def verify(self, password, password_hash):
+        """Check a password against a stored bcrypt hash (bytes or str)."""
+        return self._submit('verify', bcrypt.checkpw, password.encode('utf-8'), _as_bytes(password_hash)).result()
+
+    def stats(self):
+        return self.latency.stats()
+
+
+class VerifiedSessions:
+    def __init__(self, maxsize=VERIFIED_SESSIONS_SIZE):
+        """Remember which session tokens proved a user's password, so reruns never run bcrypt again.
+
+        A token stays valid only while the user's stored hash is unchanged,
+        so deleting the user or changing the password ends the session.
+        """
+        self.cache = LRUCache(maxsize=maxsize)
+
+    def issue(self, username, password_hash):
+        """New session token for a user whose password was just verified."""
+        token = secrets.token_urlsafe(32)
+        self.cache.put((username, token), _as_bytes(password_hash))
+        return token
+
+    def is_verified(self, username, token, password_hash):
+        if token is None:
+            return False
+        verified_hash = self.cache.get((username, token))
+        return verified_hash is not None and secrets.compare_digest(verified_hash, _as_bytes(password_hash))
+
+    def revoke(self, username, token):
+        self.cache.pop((username, token))
+
+
+# Shared by every session: one bcrypt pool per process and one set of verified sessions
+password_hasher = PasswordHasher()
+verified_sessions = VerifiedSessions()
@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+
+from money import cents_of, signs_of, to_dollars
+
+ROLLUP_LEVELS = ['Period', 'Category', 'Source']
+ROLLUP_COLUMNS = ['income_cents', 'expense_cents', 'income_count', 'expense_count', 'count']
+
+# Grain name -> pandas period frequency. Weekly periods run Monday to Sunday, i.e. ISO weeks.
+ROLLUP_GRAINS = {'day': 'D', 'week': 'W-SUN', 'month': 'M', 'year': 'Y'}
+
+# Source label for frames without a Source column (plain statement imports)
+DEFAULT_SOURCE = 'Statement'
+
+# Reported dollar column -> (stored cents column, count telling whether it had any contributing rows)
+DOLLAR_COLUMNS = {'income': ('income_cents', 'income_count'), 'expenses': ('expense_cents', 'expense_count')}
+
+
+class RollupStore:
+    def __init__(self, tables):
+        """Wrap per-grain rollup tables; use from_frame() or append() to build one."""
+        # grain -> one row per (Period, Category, Source) with exact income and expense cents and counts
+        self.tables = tables
+
+    @staticmethod
+    def _daily(frame):
+        """Roll raw transactions up to (day, Category, Source) in one groupby pass."""
+        cents = cents_of(frame).to_numpy(dtype=np.int64)
+        sign = signs_of(frame).to_numpy()
+        parts = pd.DataFrame({
+            'Period': frame['Date'].dt.normalize(),
+            'Category': frame['Category'].astype(object),
+            'Source': frame['Source'].astype(object) if 'Source' in frame.columns else DEFAULT_SOURCE,
+            'income_cents': np.where(sign > 0, cents, 0),
+            'expense_cents': np.where(sign < 0, -cents, 0),
+            'income_count': (sign > 0).astype(int),
+            'expense_count': (sign < 0).astype(int),
+            'count': 1
+        }, index=frame.index)
+        daily = parts.groupby(ROLLUP_LEVELS, sort=True).sum()
+        return daily.set_axis(daily.index.set_levels(daily.index.levels[0].to_period('D'), level=0))
+
+    @staticmethod
+    def _coarsen(daily, freq):
+        """Re-key a daily table to a coarser period frequency."""
+        periods = daily.index.get_level_values('Period').asfreq(freq)
+        return daily.groupby([
+            periods,
+            daily.index.get_level_values('Category'),
+            daily.index.get_level_values('Source')
+        ]).sum().rename_axis(ROLLUP_LEVELS)
+
+    @classmethod
+    def from_daily(cls, daily):
+        """Derive every grain from a daily table (small compared to the transactions)."""
+        return cls({grain: daily if freq == 'D' else cls._coarsen(daily, freq) for grain, freq in ROLLUP_GRAINS.items()})
+
+    @classmethod
+    def from_frame(cls, frame):
+        """Build all rollups from categorized transactions (Date, Amount, Category and optional Source)."""
+        if len(frame) == 0:
+            return cls.empty()
+        return cls.from_daily(cls._daily(frame))
+
+    @classmethod
+    def empty(cls):
+        index = pd.MultiIndex.from_arrays([pd.PeriodIndex([], freq='D'), [], []], names=ROLLUP_LEVELS)
+        daily = pd.DataFrame({column: pd.Series(dtype='int64') for column in ROLLUP_COLUMNS}, index=index)
+        return cls({grain: daily.set_axis(index.set_levels(index.levels[0].asfreq(freq), level=0)) for grain, freq in ROLLUP_GRAINS.items()})
+
+    @staticmethod
+    def _merge(table, new_rows):
+        """Add new_rows into table: existing keys are summed in place, unseen keys inserted in order."""
+        if len(table) == 0:
+            return new_rows
+        positions = table.index.get_indexer(new_rows.index)
+        seen = positions >= 0
+        values = table.to_numpy(copy=True)
+        values[positions[seen]] += new_rows.to_numpy()[seen]
+        merged = pd.DataFrame(values, index=table.index, columns=table.columns)
+        if seen.all():
+            return merged
+        return pd.concat([merged, new_rows[~seen]]).sort_index()
+
+    def append(self, frame):
+        """Add new transactions, touching only their own periods' rows; returns a new store."""
+        if len(frame) == 0:
+            return self
+        new_daily = self._daily(frame)
+        return RollupStore({
+            grain: self._merge(self.tables[grain], new_daily if freq == 'D' else self._coarsen(new_daily, freq))
+            for grain, freq in ROLLUP_GRAINS.items()
+        })
+
+    def filter(self, start=None, end=None, categories=None):
+        """Restrict to whole days between start and end (inclusive) and to the given categories."""
+        daily = self.tables['day']
+        keep = pd.Series(True, index=daily.index)
+        days = daily.index.get_level_values('Period')
+        if start is not None:
+            keep &= days >= pd.Period(start, freq='D')
+        if end is not None:
+            keep &= days <= pd.Period(end, freq='D')
+        if categories:
+            keep &= daily.index.get_level_values('Category').isin(list(categories))
+        return RollupStore.from_daily(daily[keep.to_numpy()])
+
+    @property
+    def transaction_count(self):
+        return int(self.tables['day']['count'].sum())
+
+    def periods(self, grain):
+        """Sorted periods of a grain that have transactions."""
+        return self.tables[grain].index.get_level_values('Period').unique().sort_values()
+
+    def totals(self, grain, categories=None, sources=None):
+        """Income, expenses, net and counts per period, optionally for some categories or sources only."""
+        table = self.tables[grain]
+        if categories is not None:
+            table = table[table.index.get_level_values('Category').isin(list(categories))]
+        if sources is not None:
+            table = table[table.index.get_level_values('Source').isin(list(sources))]
+        sums = table.groupby(level='Period').sum()
+        totals = pd.DataFrame({
+            'income': to_dollars(sums['income_cents']),
+            'expenses': to_dollars(sums['expense_cents']),
+            'income_count': sums['income_count'],
+            'expense_count': sums['expense_count'],
+            'count': sums['count'],
+            'net': to_dollars(sums['income_cents'] - sums['expense_cents'])
+        }, index=sums.index)
+        return totals
+
+    def by_category(self, grain, column='expenses', period=None):
+        """Income or expenses in dollars per (Period, Category), or per Category for a single period.
+
+        Only pairs with at least one contributing row are returned, matching a
+        groupby over the transactions filtered to that kind of amount.
+        """
+        table = self.tables[grain]
+        if period is not None:
+            table = table[table.index.get_level_values('Period') == pd.Period(period, freq=ROLLUP_GRAINS[grain])]
+        levels = 'Category' if period is not None else ['Period', 'Category']
+        cents_column, count_column = DOLLAR_COLUMNS[column]
+        grouped = table[[cents_column, count_column]].groupby(level=levels).sum()
+        return to_dollars(grouped.loc[grouped[count_column] > 0, cents_column]).rename(column)
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+from pandas.arrays import PeriodArray
+
+# Repetitive text columns stored as categoricals: small integer codes plus one copy of each distinct string
+CATEGORICAL_COLUMNS = ['Category', 'Type', 'Source', 'Description']
+
+# Columns kept for computation only, hidden from previews and exports
+INTERNAL_COLUMNS = ['Cents', 'Sign']
+
+# Largest absolute amount in cents (about $21M) the compact layout stores as int32
+CENTS_INT32_LIMIT = np.iinfo(np.int32).max
+
+
+def month_keys(dates):
+    """int32 month key per date: months since 1970-01, i.e. the ordinal of the monthly Period."""
+    return dates.dt.to_period('M').array.asi8.astype(np.int32)
+
+
+def month_periods(keys):
+    """Turn month keys back into monthly Periods (for grouping and display)."""
+    return pd.Series(
+        PeriodArray(np.asarray(keys, dtype=np.int64), dtype=pd.PeriodDtype('M')),
+        index=keys.index if isinstance(keys, pd.Series) else None,
+        name='Month'
+    )
+
+
+def compact_transactions(frame):
+    """Return the transaction frame in its compact in-memory layout.
+
+    Category, Type, Source and Description become categoricals and the Month
+    period column is replaced by an int32 MonthKey. Cents are stored as int32
+    when every amount fits, and the Sign flags are dropped since money.signs_of
+    derives them from the cents. Dates and dollar amounts keep their dtypes.
+    """
+    compact = frame.astype({column: 'category' for column in CATEGORICAL_COLUMNS if column in frame.columns})
+    if 'Month' in compact.columns and 'Date' in compact.columns:
+        compact['MonthKey'] = month_keys(compact['Date'])
+        compact = compact.drop(columns='Month')
+    if 'Cents' in compact.columns and len(compact) and compact['Cents'].abs().max() <= CENTS_INT32_LIMIT:
+        compact['Cents'] = compact['Cents'].astype(np.int32)
+    return compact.drop(columns='Sign', errors='ignore')
+
+
+def display_transactions(frame):
+    """The frame as users see it: internal columns dropped and the month key shown as YYYY-MM."""
+    display = frame.drop(columns=[column for column in INTERNAL_COLUMNS if column in frame.columns])
+    if 'MonthKey' in display.columns:
+        display = display.drop(columns='MonthKey').assign(Month=month_periods(display['MonthKey']).astype(str))
+    return display
+
+
+def drop_unused_categories(frame):
+    """Forget categories a filtered view no longer contains, so counts and legends only show what is there."""
+    columns = [column for column in CATEGORICAL_COLUMNS
+               if column in frame.columns and isinstance(frame[column].dtype, pd.CategoricalDtype)]
+    if not columns:
+        return frame
+    frame = frame.copy()
+    for column in columns:
+        frame[column] = frame[column].cat.remove_unused_categories()
+    return frame
+
+
+def memory_report(frame):
+    """Deep memory use in bytes per column, plus a Total entry."""
+    usage = frame.memory_usage(deep=True, index=False)
+    usage['Total'] = usage.sum()
+    return usage
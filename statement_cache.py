@@ -0,0 +1,111 @@
+import hashlib
+import io
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
+# Bump when the processed frame layout changes so old cache files are ignored
+CACHE_FORMAT_VERSION = 3
+
+# Arrow schema metadata key holding the rows whose dates could not be parsed
+DATE_FAILURES_KEY = b'date_failures'
+
+
+class StatementCache:
+    def __init__(self, cache_dir, max_entries=20):
+        """Keep processed statements as Arrow IPC files under cache_dir, one folder per owner."""
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+
+    @property
+    def enabled(self):
+        """Whether the on-disk cache can be used (needs pyarrow)."""
+        return ARROW_AVAILABLE
+
+    def make_key(self, content, *parts):
+        """Hash raw file bytes together with anything else the processed result depends on."""
+        digest = hashlib.sha256()
+        digest.update(f"v{CACHE_FORMAT_VERSION}".encode())
+        for part in parts:
+            digest.update(repr(part).encode())
+        digest.update(content)
+        return digest.hexdigest()
+
+    def _path(self, owner, key):
+        return self.cache_dir / owner / f"{key}.arrow"
+
+    def load(self, owner, key):
+        """Return (frame, date_failures) for a key, or None on a miss.
+
+        date_failures is None or (detected format, rows whose dates could not
+        be parsed), as recorded when the statement was first processed. The
+        file is read into memory rather than mapped, so entries can be pruned
+        or replaced while a frame loaded from them is in use.
+        """
+        if not self.enabled:
+            return None
+
+        path = self._path(owner, key)
+        if not path.exists():
+            return None
+
+        try:
+            table = feather.read_table(str(path), memory_map=False)
+            frame = table.to_pandas()
+            date_failures = None
+            stored = (table.schema.metadata or {}).get(DATE_FAILURES_KEY)
+            if stored is not None:
+                stored = json.loads(stored)
+                rows = pd.read_json(io.StringIO(stored['rows']), orient='split', dtype=False, convert_dates=False)
+                date_failures = (stored['format'], rows)
+            # Touch so pruning keeps recently used statements
+            os.utime(path)
+            return frame, date_failures
+        except Exception:
+            # A truncated or unreadable file is just a miss; it gets rewritten
+            path.unlink(missing_ok=True)
+            return None
+
+    def save(self, owner, key, frame, date_failures=None):
+        """Write a processed frame for a key and prune the owner's oldest entries.
+
+        date_failures, if given, is (detected format, failed rows) and is
+        stored with the entry so a later hit can report the same rows.
+        """
+        if not self.enabled:
+            return
+
+        path = self._path(owner, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_suffix('.tmp')
+        table = pa.Table.from_pandas(frame.reset_index(drop=True))
+        if date_failures is not None:
+            date_format, rows = date_failures
+            stored = json.dumps({'format': date_format, 'rows': rows.to_json(orient='split', date_format='iso')})
+            table = table.replace_schema_metadata({**(table.schema.metadata or {}), DATE_FAILURES_KEY: stored.encode()})
+        feather.write_feather(table, str(temp_path), compression='uncompressed')
+        os.replace(temp_path, path)
+        self.prune(owner)
+
+    def prune(self, owner):
+        """Delete the owner's least recently used entries beyond max_entries."""
+        entries = sorted((self.cache_dir / owner).glob("*.arrow"), key=lambda p: p.stat().st_mtime, reverse=True)
+        for stale in entries[self.max_entries:]:
+            stale.unlink(missing_ok=True)
+
+    def clear(self, owner=None):
+        """Remove cached statements for one owner, or for everyone."""
+        if not self.cache_dir.exists():
+            return
+        pattern = f"{owner}/*.arrow" if owner else "*/*.arrow"
+        for path in self.cache_dir.glob(pattern):
+            path.unlink(missing_ok=True)
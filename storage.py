@@ -0,0 +1,534 @@
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import date, timedelta
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process locks only
+    fcntl = None
+
+# Per-user record lists the app persists
+COLLECTIONS = ['manual_expenses', 'manual_subscriptions', 'grocery_items']
+
+# Journal entries after which a collection's journal is folded into its snapshot
+JOURNAL_COMPACT_THRESHOLD = 200
+
+# Record fields indexed as the row date, first match wins
+DATE_FIELDS = ['Date', 'date', 'next_due_date']
+
+
+class _PathLock:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.depth = 0
+
+
+_path_locks = {}
+_path_locks_lock = threading.Lock()
+
+
+@contextmanager
+def file_lock(path):
+    """Hold a file's write lock: a per-path lock for threads in this process plus an
+    advisory flock on a sidecar .lock file for other processes. Re-entrant within a thread."""
+    path = Path(path)
+    with _path_locks_lock:
+        path_lock = _path_locks.setdefault(str(path.resolve()), _PathLock())
+    with path_lock.lock:
+        path_lock.depth += 1
+        try:
+            if fcntl is None or path_lock.depth > 1:
+                yield
+                return
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path.with_name(f".{path.name}.lock"), 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+        finally:
+            path_lock.depth -= 1
+
+
+def atomic_write_json(path, data, **dump_kwargs):
+    """Replace a JSON file so readers see either the old or the new content, never a torn write.
+
+    The data goes to a temp file in the same directory, is fsynced and then
+    swapped in with os.replace, all under the file's lock.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with file_lock(path):
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f, **dump_kwargs)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        if hasattr(os, 'O_DIRECTORY'):
+            dir_fd = os.open(path.parent, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+
+
+class _CoalescedKey:
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.pending = None
+        self.waiting = []
+        self.writing = False
+
+
+class _WriteTicket:
+    def __init__(self):
+        """One caller's claim on a coalesced write: set finished (and error, if it failed) once a write covering it ends."""
+        self.finished = False
+        self.error = None
+
+
+class WriteCoalescer:
+    def __init__(self):
+        """Serialize writes per key, collapsing saves that pile up behind a running write into one."""
+        self._keys = {}
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.performed = 0
+
+    def submit(self, key, write):
+        """Run write() for key, or let a newer pending write for the same key supersede it.
+
+        Returns once a write at least as new as this one has finished, so the
+        caller's data (or a later version of it) is on disk. If the write that
+        covered this call failed, its exception is raised here too.
+        """
+        with self._lock:
+            state = self._keys.setdefault(key, _CoalescedKey())
+            self.submitted += 1
+        ticket = _WriteTicket()
+        with state.condition:
+            state.pending = write
+            state.waiting.append(ticket)
+            while state.writing and not ticket.finished:
+                state.condition.wait()
+            if ticket.finished:
+                if ticket.error is not None:
+                    raise ticket.error
+                return
+            state.writing = True
+        try:
+            while True:
+                with state.condition:
+                    write, state.pending = state.pending, None
+                    covered, state.waiting = state.waiting, []
+                if write is None:
+                    break
+                try:
+                    write()
+                except Exception as error:
+                    with state.condition:
+                        for waiter in covered:
+                            waiter.finished, waiter.error = True, error
+                        state.condition.notify_all()
+                    if ticket in covered:
+                        raise
+                    break
+                with state.condition:
+                    for waiter in covered:
+                        waiter.finished = True
+                    state.condition.notify_all()
+                with self._lock:
+                    self.performed += 1
+        finally:
+            with state.condition:
+                state.writing = False
+                state.condition.notify_all()
+
+    def stats(self):
+        return {'submitted': self.submitted, 'performed': self.performed, 'coalesced': self.submitted - self.performed}
+
+
+# Shared by every session so saves of the same user's file from concurrent reruns are batched
+write_coalescer = WriteCoalescer()
+
+
+def record_keys(records):
+    """Stable key per record: its id field, or a content hash for records without one.
+
+    Repeats of the same key are numbered by occurrence so every record keeps its own row.
+    """
+    keys, seen = [], {}
+    for record in records:
+        if record.get('id') is not None:
+            key = str(record['id'])
+        else:
+            key = "auto:" + hashlib.sha1(json.dumps(record, sort_keys=True, default=str).encode()).hexdigest()
+        seen[key] = seen.get(key, 0) + 1
+        keys.append(key if seen[key] == 1 else f"{key}:{seen[key]}")
+    return keys
+
+
+def record_date(record):
+    for field in DATE_FIELDS:
+        if record.get(field) is not None:
+            return str(record[field])
+    return None
+
+
+class JSONFileStorage:
+    def __init__(self, data_dir):
+        """One JSON file per user and collection, rewritten in full on every save."""
+        self.data_dir = Path(data_dir)
+
+    def path(self, user, collection):
+        if user == 'default':
+            return self.data_dir / f"{collection}.json"
+        return self.data_dir / f"{user}_{collection}.json"
+
+    def load(self, user, collection):
+        """Stored records, or None when nothing has been saved yet."""
+        path = self.path(user, collection)
+        if not path.exists():
+            return None
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def save(self, user, collection, records):
+        atomic_write_json(self.path(user, collection), records, indent=2, default=str)
+
+    def count(self, user, collection):
+        records = self.load(user, collection)
+        return len(records) if isinstance(records, list) else 0
+
+    def clear(self, user, collection=None):
+        for name in [collection] if collection else COLLECTIONS:
+            self.path(user, name).unlink(missing_ok=True)
+
+    def clear_all(self):
+        """Delete every user's records."""
+        for collection in COLLECTIONS:
+            for path in [self.data_dir / f"{collection}.json", *self.data_dir.glob(f"*_{collection}.json")]:
+                path.unlink(missing_ok=True)
+
+
+class JournalStorage(JSONFileStorage):
+    def __init__(self, data_dir, compact_threshold=JOURNAL_COMPACT_THRESHOLD):
+        """JSON snapshot per user and collection plus an append-only JSON-lines journal of changes.
+
+        The snapshot is the same file the JSON backend writes, so switching
+        between the two needs no migration. Each save appends one journal line
+        per added, edited or deleted record; once the journal reaches
+        compact_threshold entries it is folded into a fresh snapshot.
+        """
+        super().__init__(data_dir)
+        self.compact_threshold = compact_threshold
+        self._lock = threading.RLock()
+        # (user, collection) -> {key: serialized record} in list order, as last loaded or saved.
+        # Serialized so edits callers make to loaded or saved dicts cannot leak into it.
+        self._records = {}
+        # (user, collection) -> journal entries written since the last compaction
+        self._journal_sizes = {}
+
+    def journal_path(self, user, collection):
+        return self.path(user, collection).with_suffix('.journal.jsonl')
+
+    def _replay(self, user, collection):
+        """Rebuild the records from the snapshot and the journal tail."""
+        snapshot = super().load(user, collection)
+        records = {key: json.dumps(record, default=str)
+                   for key, record in zip(record_keys(snapshot or []), snapshot or [])}
+        entries = 0
+        journal = self.journal_path(user, collection)
+        if journal.exists():
+            with open(journal, 'r') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        break  # torn last line from an interrupted append
+                    if entry['op'] == 'put':
+                        records[entry['id']] = json.dumps(entry['record'], default=str)
+                    else:
+                        records.pop(entry['id'], None)
+                    entries += 1
+        self._records[(user, collection)] = records
+        self._journal_sizes[(user, collection)] = entries
+        return snapshot is not None or entries > 0
+
+    def load(self, user, collection):
+        """Stored records, or None when nothing has been saved yet."""
+        with self._lock:
+            if not self._replay(user, collection):
+                return None
+            return [json.loads(data) for data in self._records[(user, collection)].values()]
+
+    def save(self, user, collection, records):
+        """Append the difference from the stored records to the journal, compacting when it is due."""
+        with self._lock:
+            if (user, collection) not in self._records:
+                self._replay(user, collection)
+            stored = self._records[(user, collection)]
+            current = {key: json.dumps(record, default=str) for key, record in zip(record_keys(records), records)}
+
+            removed = [key for key in stored if key not in current]
+            changed = [key for key, data in current.items() if stored.get(key) != data]
+            replayed = [key for key in stored if key in current] + [key for key in changed if key not in stored]
+            if replayed != list(current):
+                # Reordered lists cannot be expressed as puts and deletes; write them out in full
+                self._compact(user, collection, current)
+                return
+            if not (removed or changed):
+                return
+
+            lines = [json.dumps({'op': 'delete', 'id': key}) for key in removed]
+            lines += ['{"op": "put", "id": %s, "record": %s}' % (json.dumps(key), current[key]) for key in changed]
+            journal = self.journal_path(user, collection)
+            journal.parent.mkdir(parents=True, exist_ok=True)
+            with file_lock(journal), open(journal, 'a') as f:
+                f.write(''.join(line + '\n' for line in lines))
+                f.flush()
+                os.fsync(f.fileno())
+            self._records[(user, collection)] = current
+            self._journal_sizes[(user, collection)] += len(lines)
+            if self._journal_sizes[(user, collection)] >= self.compact_threshold:
+                self._compact(user, collection, current)
+
+    def _compact(self, user, collection, records):
+        """Write records as the new snapshot and empty the journal.
+
+        Replaying puts and deletes is idempotent, so a crash between the two
+        steps only leaves a journal that re-applies changes already in the
+        snapshot.
+        """
+        journal = self.journal_path(user, collection)
+        with file_lock(journal):
+            atomic_write_json(self.path(user, collection), [json.loads(data) for data in records.values()], indent=2, default=str)
+            journal.unlink(missing_ok=True)
+        self._records[(user, collection)] = records
+        self._journal_sizes[(user, collection)] = 0
+
+    def compact(self, user, collection):
+        """Fold a collection's journal into its snapshot now."""
+        with self._lock:
+            self._replay(user, collection)
+            if self._journal_sizes[(user, collection)]:
+                self._compact(user, collection, self._records[(user, collection)])
+
+    def count(self, user, collection):
+        with self._lock:
+            self._replay(user, collection)
+            return len(self._records[(user, collection)])
+
+    def clear(self, user, collection=None):
+        with self._lock:
+            for name in [collection] if collection else COLLECTIONS:
+                self.path(user, name).unlink(missing_ok=True)
+                self.journal_path(user, name).unlink(missing_ok=True)
+                self._records.pop((user, name), None)
+
+    def clear_all(self):
+        """Delete every user's records."""
+        with self._lock:
+            super().clear_all()
+            for collection in COLLECTIONS:
+                for path in [self.journal_path('default', collection), *self.data_dir.glob(f"*_{collection}.journal.jsonl")]:
+                    path.unlink(missing_ok=True)
+            self._records.clear()
+
+
+class SQLiteStorage:
+    def __init__(self, db_path, import_dir=None):
+        """Records in an SQLite database (WAL mode), one table per user and collection.
+
+        Saves write only the rows that changed since the last load or save.
+        Legacy JSON files (and their journals) under import_dir are imported the first time a
+        user's collection is opened.
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.json_files = JournalStorage(import_dir) if import_dir is not None else None
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS storage_tables (name TEXT PRIMARY KEY)")
+        self._connection.commit()
+        # (user, collection) -> {key: serialized record} as last loaded or saved, for diffing saves
+        self._saved = {}
+
+    @staticmethod
+    def table_name(user, collection):
+        return f"{collection}__{user}"
+
+    @staticmethod
+    def _quote(name):
+        return '"' + name.replace('"', '""') + '"'
+
+    def _ensure_table(self, user, collection):
+        """Create the user's table on first use, importing a legacy JSON file if there is one."""
+        name = self.table_name(user, collection)
+        if self._connection.execute("SELECT 1 FROM storage_tables WHERE name = ?", (name,)).fetchone():
+            return self._quote(name)
+
+        table = self._quote(name)
+        with self._connection:
+            self._connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "seq INTEGER PRIMARY KEY, id TEXT NOT NULL UNIQUE, record_date TEXT, data TEXT NOT NULL)"
+            )
+            self._connection.execute(f"CREATE INDEX IF NOT EXISTS {self._quote(name + '__date')} ON {table} (record_date)")
+            self._connection.execute("INSERT INTO storage_tables (name) VALUES (?)", (name,))
+        if self.json_files is not None:
+            records = self.json_files.load(user, collection)
+            if records:
+                self.insert(user, collection, records)
+        return table
+
+    def import_json(self, user, collection, path):
+        """Append the records of a JSON list file (e.g. an exported or legacy file); returns how many."""
+        with open(path, 'r') as f:
+            records = json.load(f)
+        self.insert(user, collection, records)
+        return len(records)
+
+    def load(self, user, collection):
+        """Stored records in insertion order, or None when the user has none."""
+        with self._lock:
+            table = self._ensure_table(user, collection)
+            rows = self._connection.execute(f"SELECT id, data FROM {table} ORDER BY seq").fetchall()
+            self._saved[(user, collection)] = dict(rows)
+        return [json.loads(data) for _, data in rows] if rows else None
+
+    def _rows(self, records):
+        keys = record_keys(records)
+        return [(key, record_date(record), json.dumps(record, default=str)) for key, record in zip(keys, records)]
+
+    def insert(self, user, collection, records):
+        """Add records as new rows."""
+        with self._lock:
+            table = self._ensure_table(user, collection)
+            rows = self._rows(records)
+            with self._connection:
+                self._connection.executemany(f"INSERT OR REPLACE INTO {table} (id, record_date, data) VALUES (?, ?, ?)", rows)
+            self._saved.get((user, collection), {}).update((key, data) for key, _, data in rows)
+
+    def update(self, user, collection, records):
+        """Rewrite existing records in place, matched by key."""
+        with self._lock:
+            table = self._ensure_table(user, collection)
+            rows = self._rows(records)
+            with self._connection:
+                self._connection.executemany(
+                    f"UPDATE {table} SET record_date = ?, data = ? WHERE id = ?",
+                    [(day, data, key) for key, day, data in rows]
+                )
+            self._saved.get((user, collection), {}).update((key, data) for key, _, data in rows)
+
+    def delete(self, user, collection, keys):
+        """Remove records by key."""
+        with self._lock:
+            table = self._ensure_table(user, collection)
+            with self._connection:
+                self._connection.executemany(f"DELETE FROM {table} WHERE id = ?", [(key,) for key in keys])
+            saved = self._saved.get((user, collection), {})
+            for key in keys:
+                saved.pop(key, None)
+
+    def save(self, user, collection, records):
+        """Store the full record list, writing only inserted, changed and removed rows."""
+        with self._lock:
+            if (user, collection) not in self._saved:
+                self.load(user, collection)
+            saved = self._saved[(user, collection)]
+            rows = self._rows(records)
+            current = {key: data for key, _, data in rows}
+
+            removed = [key for key in saved if key not in current]
+            added = [(key, day, data) for key, day, data in rows if key not in saved]
+            changed = [(day, data, key) for key, day, data in rows if key in saved and saved[key] != data]
+            if not (removed or added or changed):
+                return
+
+            table = self._ensure_table(user, collection)
+            with self._connection:
+                if removed:
+                    self._connection.executemany(f"DELETE FROM {table} WHERE id = ?", [(key,) for key in removed])
+                if added:
+                    self._connection.executemany(f"INSERT INTO {table} (id, record_date, data) VALUES (?, ?, ?)", added)
+                if changed:
+                    self._connection.executemany(f"UPDATE {table} SET record_date = ?, data = ? WHERE id = ?", changed)
+            self._saved[(user, collection)] = current
+
+    def records_between(self, user, collection, start, end):
+        """Records dated from start through end (dates or ISO strings), found through the date index."""
+        end_exclusive = date.fromisoformat(str(end)[:10]) + timedelta(days=1)
+        with self._lock:
+            table = self._ensure_table(user, collection)
+            rows = self._connection.execute(
+                f"SELECT data FROM {table} WHERE record_date >= ? AND record_date < ? ORDER BY seq",
+                (str(start)[:10], end_exclusive.isoformat())
+            ).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def count(self, user, collection):
+        with self._lock:
+            table = self._ensure_table(user, collection)
+            return self._connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def clear(self, user, collection=None):
+        """Delete a user's records; the tables stay so legacy JSON files are not imported again."""
+        with self._lock:
+            for name in [collection] if collection else COLLECTIONS:
+                table = self._ensure_table(user, name)
+                with self._connection:
+                    self._connection.execute(f"DELETE FROM {table}")
+                self._saved[(user, name)] = {}
+
+    def clear_all(self):
+        """Delete every user's records."""
+        with self._lock:
+            names = [name for (name,) in self._connection.execute("SELECT name FROM storage_tables").fetchall()]
+            with self._connection:
+                for name in names:
+                    self._connection.execute(f"DELETE FROM {self._quote(name)}")
+            self._saved.clear()
+
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+STORAGE_BACKENDS = ('sqlite', 'journal', 'json')
+
+_storages = {}
+_storages_lock = threading.Lock()
+
+
+def get_storage(backend, data_dir):
+    """Shared storage instance per backend and data directory (one SQLite connection per process)."""
+    data_dir = Path(data_dir)
+    with _storages_lock:
+        key = (backend, data_dir.resolve())
+        if key not in _storages:
+            if backend == 'sqlite':
+                _storages[key] = SQLiteStorage(data_dir / "user_data.sqlite3", import_dir=data_dir)
+            elif backend == 'journal':
+                _storages[key] = JournalStorage(data_dir)
+            elif backend == 'json':
+                _storages[key] = JSONFileStorage(data_dir)
+            else:
+                raise ValueError(f"Unknown storage backend {backend!r}; choose one of {STORAGE_BACKENDS}")
+        return _storages[key]
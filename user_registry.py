@@ -0,0 +1,111 @@
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+from types import MappingProxyType
+
+from storage import atomic_write_json, file_lock
+
+
+def users_from_json(users_data):
+    """Turn users.json content into registry entries (bytes hashes, datetime creation times)."""
+    users = {}
+    for username, user_info in users_data.items():
+        user_info = dict(user_info)
+        if isinstance(user_info['password_hash'], str):
+            user_info['password_hash'] = user_info['password_hash'].encode('utf-8')
+        if isinstance(user_info['created_at'], str):
+            user_info['created_at'] = datetime.fromisoformat(user_info['created_at'])
+        users[username] = MappingProxyType(user_info)
+    return users
+
+
+def users_to_json(users):
+    """Serializable form of registry entries for users.json."""
+    return {
+        username: {
+            'password_hash': user_info['password_hash'].decode('utf-8') if isinstance(user_info['password_hash'], bytes) else user_info['password_hash'],
+            'role': user_info['role'],
+            'created_at': user_info['created_at'].isoformat() if isinstance(user_info['created_at'], datetime) else user_info['created_at'],
+            'permissions': list(user_info['permissions']),
+            'is_test_user': user_info.get('is_test_user', False)
+        }
+        for username, user_info in users.items()
+    }
+
+
+class UserRegistry:
+    def __init__(self, users_file):
+        """Users shared by every session in the process, backed by users.json.
+
+        Readers get an immutable snapshot. Changes copy it, write the file and
+        publish the copy, so a snapshot a session holds never changes under
+        it. The file is re-read when its mtime or size changes, which picks up
+        edits from other processes.
+        """
+        self.users_file = Path(users_file)
+        self.version = 0
+        self._users = MappingProxyType({})
+        self._stamp = None
+        self._lock = threading.Lock()
+
+    def _file_stamp(self):
+        try:
+            stat = self.users_file.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _publish(self, users, stamp):
+        self._users = MappingProxyType(users)
+        self._stamp = stamp
+        self.version += 1
+
+    def _refresh(self):
+        """Reload users.json if it changed since it was last read or written (lock held)."""
+        stamp = self._file_stamp()
+        if stamp == self._stamp:
+            return
+        users_data = {}
+        if stamp is not None:
+            with open(self.users_file, 'r') as f:
+                users_data = json.load(f)
+        self._publish(users_from_json(users_data), stamp)
+
+    def snapshot(self):
+        """Current users as a read-only mapping of username -> read-only user info."""
+        if self._file_stamp() != self._stamp:
+            with self._lock:
+                self._refresh()
+        return self._users
+
+    def update(self, change):
+        """Apply change(users) to a copy of the latest users, save it and publish it; returns the new snapshot."""
+        with self._lock, file_lock(self.users_file):
+            self._refresh()
+            users = dict(self._users)
+            change(users)
+            users_data = users_to_json(users)
+            atomic_write_json(self.users_file, users_data, indent=2)
+            self._publish(users_from_json(users_data), self._file_stamp())
+            return self._users
+
+    def replace(self, users):
+        """Swap in a whole new set of users."""
+        def replace_all(current):
+            current.clear()
+            current.update(users)
+        return self.update(replace_all)
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def get_user_registry(users_file):
+    """Shared registry per users file, so every session sees the same users."""
+    key = Path(users_file).resolve()
+    with _registries_lock:
+        if key not in _registries:
+            _registries[key] = UserRegistry(users_file)
+        return _registries[key]